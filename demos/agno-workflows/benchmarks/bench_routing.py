@@ -0,0 +1,137 @@
+"""Routing accuracy and latency of the keyword router (and optionally the LLM selector).
+
+Routes every question in routing_questions.yml with `routing.AgentRouter` and reports
+top-1 accuracy, how many questions were routed confidently (no LLM call needed), the
+accuracy of those confident decisions and the per-question routing latency.
+
+    python benchmarks/bench_routing.py
+    python benchmarks/bench_routing.py --llm   # also time the LLM identify_agent (needs ANTHROPIC_API_KEY)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+_DEMO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_DEMO_ROOT / "src"))
+
+from routing import AgentRouter  # noqa: E402
+
+
+def _load_configs() -> dict[str, dict]:
+    configs = {}
+    for path in sorted((_DEMO_ROOT / "config" / "agents").glob("*.yml")):
+        with open(path) as f:
+            configs[path.stem] = yaml.safe_load(f)
+    return configs
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def bench_router(questions: list[dict], repeats: int) -> dict:
+    start = time.perf_counter()
+    router = AgentRouter(_load_configs())
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies_us = []
+    correct = confident = confident_correct = 0
+    misses = []
+    for item in questions:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            decision = router.route(item["question"])
+            latencies_us.append((time.perf_counter() - start) * 1_000_000)
+        hit = decision.agent_slug == item["agent"]
+        correct += hit
+        if decision.confident:
+            confident += 1
+            confident_correct += hit
+        if not hit:
+            misses.append({
+                "question": item["question"],
+                "expected": item["agent"],
+                "routed": decision.agent_slug,
+                "confident": decision.confident,
+                "score": round(decision.score, 3),
+            })
+
+    return {
+        "questions": len(questions),
+        "index_build_ms": round(build_ms, 3),
+        "top1_accuracy": round(correct / len(questions), 3),
+        "confident_rate": round(confident / len(questions), 3),
+        "confident_accuracy": round(confident_correct / confident, 3) if confident else None,
+        "latency_us_p50": round(_percentile(latencies_us, 0.50), 1),
+        "latency_us_p99": round(_percentile(latencies_us, 0.99), 1),
+        "misses": misses,
+    }
+
+
+async def bench_llm(questions: list[dict]) -> dict:
+    from workflow import AgentSelection, identify_agent
+
+    latencies = []
+    correct = 0
+    for item in questions:
+        start = time.perf_counter()
+        response = await identify_agent.arun(item["question"])
+        latencies.append(time.perf_counter() - start)
+        content = response.content
+        selection = (
+            AgentSelection.model_validate_json(content) if isinstance(content, str)
+            else AgentSelection.model_validate(content)
+        )
+        correct += selection.agent_slug.strip().lower() == item["agent"]
+    return {
+        "top1_accuracy": round(correct / len(questions), 3),
+        "latency_ms_p50": round(statistics.median(latencies) * 1000, 1),
+        "latency_ms_max": round(max(latencies) * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", default=str(Path(__file__).parent / "routing_questions.yml"))
+    parser.add_argument("--repeats", type=int, default=200, help="Routing calls per question for the latency figures")
+    parser.add_argument("--llm", action="store_true", help="Also route every question with the LLM selector")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with open(args.questions) as f:
+        questions = yaml.safe_load(f)["questions"]
+
+    results = {"router": bench_router(questions, args.repeats)}
+    router = results["router"]
+    print(f"{router['questions']} questions, index built in {router['index_build_ms']:.2f} ms")
+    print(f"keyword router: top-1 accuracy {router['top1_accuracy']:.1%}, "
+          f"confident on {router['confident_rate']:.1%} (accuracy {router['confident_accuracy'] or 0:.1%}), "
+          f"p50 {router['latency_us_p50']:.0f} µs, p99 {router['latency_us_p99']:.0f} µs")
+    for miss in router["misses"]:
+        flag = "confident" if miss["confident"] else "falls back to LLM"
+        print(f"  miss ({flag}): {miss['question']!r} → {miss['routed']} (expected {miss['expected']})")
+
+    if args.llm:
+        results["llm"] = asyncio.run(bench_llm(questions))
+        llm = results["llm"]
+        print(f"LLM selector: top-1 accuracy {llm['top1_accuracy']:.1%}, "
+              f"p50 {llm['latency_ms_p50']:.0f} ms, max {llm['latency_ms_max']:.0f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Startup cost of the AgentOS server (src/server.py) with many generated agent configs.
+
+Generates --agents agent configs (copies of config/agents/*.yml with new slugs, names and
+descriptions) in a temporary directory, then imports `server` — which loads the workflow,
+registers it with AgentOS and builds the FastAPI app — in fresh interpreters with
+AGENTS_DIR pointing at it and reports, per scenario, the median time spent by the server
+and workflow modules themselves (agno and the other libraries are imported and timed
+separately) and peak RSS:
+
+  server start  — the default: no agents registered with AgentOS, none built
+  first agent   — server start plus building the first agent a question needs
+  eager build   — AGENTOS_AGENTS=all: every agent built and registered at startup, as the
+                  server did before agents were built on demand
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --agents 1000 --repeats 5 --output startup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import yaml
+
+_DEMO_ROOT = Path(__file__).resolve().parent.parent
+
+_WORDS = (
+    "orders returns shipments warehouse stock suppliers invoices payments refunds churn loyalty "
+    "campaigns sessions clicks subscriptions revenue margin forecast regions stores products "
+    "pricing discounts tickets support employees payroll fleet deliveries carriers claims"
+).split()
+
+_CHILD = """
+import json, logging, resource, sys, time
+# Import the libraries first so their (constant) cost does not hide the modules' own work
+start = time.perf_counter()
+import agno.agent, agno.db.sqlite, agno.models.anthropic, agno.os, agno.tools.file, agno.tools.postgres, agno.workflow
+timings = {"libraries_s": time.perf_counter() - start}
+start = time.perf_counter()
+import server
+timings["import_s"] = time.perf_counter() - start
+logging.disable(logging.CRITICAL)
+import workflow
+if sys.argv[1] == "first":
+    start = time.perf_counter()
+    workflow._agent_cache.get(next(iter(workflow._agent_configs)))
+    timings["build_s"] = time.perf_counter() - start
+timings["total_s"] = timings["import_s"] + timings.get("build_s", 0.0)
+timings["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+timings["agents"] = len(workflow._agent_configs)
+timings["built"] = len(workflow._agent_cache)
+print(json.dumps(timings))
+"""
+
+# label: (child scenario, AGENTOS_AGENTS)
+SCENARIOS = {"server start": ("start", ""), "first agent": ("first", ""), "eager build": ("start", "all")}
+
+
+def generate_configs(target: Path, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    templates = []
+    for path in sorted((_DEMO_ROOT / "config" / "agents").glob("*.yml")):
+        with open(path) as f:
+            templates.append(yaml.safe_load(f))
+    for i in range(count):
+        config = dict(rng.choice(templates))
+        topic = " ".join(rng.sample(_WORDS, 3))
+        config["name"] = f"Generated {i:04d} Agent"
+        config["description"] = f"Generated data product {i:04d} about {topic}."
+        with open(target / f"generated-{i:04d}.yml", "w") as f:
+            yaml.dump(config, f, default_flow_style=False, allow_unicode=True)
+
+
+def run_scenario(scenario: str, agentos_agents: str, agents_dir: Path) -> dict:
+    env = {**os.environ, "AGENTS_DIR": str(agents_dir), "AGENTOS_AGENTS": agentos_agents}
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD, scenario],
+        cwd=_DEMO_ROOT / "src", env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"{scenario} run failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=500, help="Number of agent configs to generate")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"agents": args.agents, "scenarios": {}}
+    with tempfile.TemporaryDirectory(prefix="agents-") as tmp:
+        agents_dir = Path(tmp)
+        generate_configs(agents_dir, args.agents, args.seed)
+        print(f"{args.agents} generated agent configs in {agents_dir}")
+        for label, (scenario, agentos_agents) in SCENARIOS.items():
+            runs = [run_scenario(scenario, agentos_agents, agents_dir) for _ in range(args.repeats)]
+            summary = {
+                "total_ms": round(statistics.median(r["total_s"] for r in runs) * 1000, 1),
+                "import_ms": round(statistics.median(r["import_s"] for r in runs) * 1000, 1),
+                "libraries_ms": round(statistics.median(r["libraries_s"] for r in runs) * 1000, 1),
+                "max_rss_mb": round(statistics.median(r["max_rss_mb"] for r in runs), 1),
+                "agents_built": runs[0]["built"],
+            }
+            results["scenarios"][label] = summary
+            print(f"{label:<12} {summary['total_ms']:>9.1f} ms  (import {summary['import_ms']:.1f} ms, "
+                  f"libraries {summary['libraries_ms']:.0f} ms)  "
+                  f"{summary['max_rss_mb']:>7.1f} MB RSS  {summary['agents_built']} agents built")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Access-control store: which data agents each user may query.
+
+`YamlAccessStore` keeps config/access.yml parsed in memory as user → set of agents and
+re-reads it only when the file's mtime or size changes (e.g. after `task reset-access`).
+Grants go through a single asyncio writer task that batches them and replaces the file
+atomically, so concurrent workflow runs never interleave a read-modify-write.
+
+`SqliteAccessStore` keeps the same data in the workflow's SQLite file instead, for
+deployments where many workers grant access at once. Pick it with ACCESS_STORE=sqlite.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import os
+import sqlite3
+import stat
+import tempfile
+from contextlib import closing
+from pathlib import Path
+
+import yaml
+
+ACCESS_STORE = os.getenv("ACCESS_STORE", "yaml")
+
+
+def _index(data: dict) -> dict[str, frozenset[str]]:
+    return {
+        user: frozenset(str(agent).strip().lower() for agent in (entry or {}).get("accessible_agents") or [])
+        for user, entry in ((data or {}).get("users") or {}).items()
+    }
+
+
+class YamlAccessStore:
+    """access.yml, indexed in memory and written by one async writer."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._data: dict = {}
+        self._users: dict[str, frozenset[str]] = {}
+        self._signature: tuple[int, int] | None = None
+        self._pending: asyncio.Queue | None = None
+        self._writer: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reload_if_changed()
+
+    def _reload_if_changed(self) -> None:
+        try:
+            info = self.path.stat()
+        except FileNotFoundError:
+            self._data, self._users, self._signature = {}, {}, None
+            return
+        signature = (info.st_mtime_ns, info.st_size)
+        if signature == self._signature:
+            return
+        with open(self.path) as f:
+            data = yaml.safe_load(f) or {}
+        self._data, self._users, self._signature = data, _index(data), signature
+
+    async def has_access(self, user: str, agent: str) -> bool:
+        self._reload_if_changed()
+        return agent in self._users.get(user, frozenset())
+
+    async def grant(self, user: str, agent: str) -> None:
+        """Queue a grant and wait until it has been written to disk."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queue and writer task belong to one event loop; start fresh on a new one
+            self._loop, self._pending, self._writer = loop, asyncio.Queue(), None
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._write_loop())
+        done = loop.create_future()
+        await self._pending.put((user, agent, done))
+        await done
+
+    async def _write_loop(self) -> None:
+        while True:
+            batch = [await self._pending.get()]
+            while not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            try:
+                await asyncio.to_thread(self._apply, [(user, agent) for user, agent, _ in batch])
+            except Exception as e:
+                # Keep the writer alive; only this batch's callers see the failure
+                for _, _, done in batch:
+                    if not done.done():
+                        done.set_exception(e)
+            else:
+                for _, _, done in batch:
+                    # A caller cancelled while waiting has already resolved its future
+                    if not done.done():
+                        done.set_result(None)
+
+    def _apply(self, grants: list[tuple[str, str]]) -> None:
+        self._reload_if_changed()
+        # Change a copy: the cached index must not show grants whose write then failed
+        data = copy.deepcopy(self._data)
+        for user, agent in grants:
+            accessible = (
+                data.setdefault("users", {})
+                .setdefault(user, {})
+                .setdefault("accessible_agents", [])
+            )
+            if agent not in accessible:
+                accessible.append(agent)
+        # Write next to the target and rename over it, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+            # mkstemp creates the file as 0600 and owned by us; keep what access.yml had
+            try:
+                original = self.path.stat()
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o644)
+            else:
+                os.chmod(tmp_path, stat.S_IMODE(original.st_mode))
+                try:
+                    os.chown(tmp_path, original.st_uid, original.st_gid)
+                except PermissionError:
+                    pass
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        info = self.path.stat()
+        self._data, self._users, self._signature = data, _index(data), (info.st_mtime_ns, info.st_size)
+
+
+class SqliteAccessStore:
+    """Grants in an indexed SQLite table, seeded from access.yml the first time."""
+
+    def __init__(self, db_file: Path, seed_file: Path | None = None):
+        self.db_file = db_file
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'agent_access'"
+            ).fetchone()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS agent_access ("
+                "user TEXT NOT NULL, agent TEXT NOT NULL, PRIMARY KEY (user, agent))"
+            )
+            if not exists and seed_file is not None and seed_file.exists():
+                with open(seed_file) as f:
+                    users = _index(yaml.safe_load(f))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO agent_access VALUES (?, ?)",
+                    [(user, agent) for user, agents in users.items() for agent in agents],
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file, timeout=5.0)
+
+    async def has_access(self, user: str, agent: str) -> bool:
+        def select() -> bool:
+            with closing(self._connect()) as conn:
+                return conn.execute(
+                    "SELECT 1 FROM agent_access WHERE user = ? AND agent = ?", (user, agent)
+                ).fetchone() is not None
+
+        return await asyncio.to_thread(select)
+
+    async def grant(self, user: str, agent: str) -> None:
+        def insert() -> None:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("INSERT OR IGNORE INTO agent_access VALUES (?, ?)", (user, agent))
+
+        await asyncio.to_thread(insert)
+
+
+def open_access_store(access_file: Path, db_file: Path, backend: str = ACCESS_STORE):
+    if backend == "sqlite":
+        return SqliteAccessStore(db_file, seed_file=access_file)
+    return YamlAccessStore(access_file)
@@ -0,0 +1,221 @@
+"""Deterministic question → data agent router.
+
+Builds a TF-IDF index over each agent config's name, description, instructions and
+allowed_schemas once, then scores a question against it with plain Python (no model
+call). `AgentRouter.route` returns a confident decision when the best agent clearly
+beats the runner-up; otherwise the workflow falls back to the LLM `identify_agent`.
+`RoutingCache` remembers those LLM decisions in SQLite so repeat questions skip it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# How much each config field counts towards an agent's document
+FIELD_WEIGHTS = {"name": 3, "allowed_schemas": 3, "description": 2, "instructions": 1}
+
+# A decision is confident when the best cosine score reaches MIN_SCORE and beats the
+# runner-up by MIN_MARGIN (absolute) — otherwise the question is ambiguous
+MIN_SCORE = 0.08
+MIN_MARGIN = 0.1
+
+_STOPWORDS = frozenset(
+    """a about above after again all also am an and any are as at be been before being below between
+    both but by can could did do does doing down during each few for from further had has have having
+    he her here hers him his how i if in into is it its itself just last let me more most my no nor not
+    now of off on once only or other our ours out over own per same she should show so some such than
+    that the their theirs them then there these they this those through to too under until up us very
+    was we were what when where which while who whom why will with would you your yours give get tell
+    list many much top""".split()
+)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Very light suffix stripping so 'orders'/'order' and 'customers'/'customer' match."""
+    for suffix in ("ies", "ing", "es", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            if suffix == "ies":
+                return token[: -len(suffix)] + "y"
+            if suffix == "es" and not token.endswith(("ses", "xes", "ches", "shes")):
+                return token[:-1]
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, stemmed word tokens; snake_case and kebab-case names are split."""
+    return [_stem(t) for t in _TOKEN.findall(text.lower().replace("_", " ")) if t not in _STOPWORDS]
+
+
+def _config_document(config: dict) -> Counter:
+    terms: Counter = Counter()
+    for field_name, weight in FIELD_WEIGHTS.items():
+        value = config.get(field_name) or ""
+        if isinstance(value, list):
+            value = " ".join(str(v) for v in value)
+        for token in tokenize(str(value)):
+            terms[token] += weight
+    return terms
+
+
+@dataclass
+class RoutingDecision:
+    agent_slug: str | None
+    score: float
+    runner_up: str | None
+    runner_up_score: float
+    confident: bool
+    scores: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def reason(self) -> str:
+        if self.agent_slug is None:
+            return "No agent config matches the question."
+        return (
+            f"Matched {self.agent_slug} by keyword similarity ({self.score:.2f}"
+            + (f" vs {self.runner_up_score:.2f} for {self.runner_up})." if self.runner_up else ").")
+        )
+
+
+class AgentRouter:
+    """TF-IDF cosine-similarity router over agent configs."""
+
+    def __init__(self, configs: dict[str, dict], min_score: float = MIN_SCORE, min_margin: float = MIN_MARGIN):
+        self.min_score = min_score
+        self.min_margin = min_margin
+        documents = {slug: _config_document(config) for slug, config in configs.items()}
+        document_frequency: Counter = Counter()
+        for terms in documents.values():
+            document_frequency.update(terms.keys())
+        count = len(documents)
+        self.idf = {term: math.log((1 + count) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self.vectors = {slug: self._vector(terms) for slug, terms in documents.items()}
+
+    def _vector(self, terms: Counter) -> dict[str, float]:
+        weights = {
+            term: (1 + math.log(tf)) * self.idf[term] for term, tf in terms.items() if term in self.idf
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {term: w / norm for term, w in weights.items()}
+
+    def scores(self, question: str) -> dict[str, float]:
+        query = self._vector(Counter(tokenize(question)))
+        return {
+            slug: sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            for slug, vector in self.vectors.items()
+        }
+
+    def route(self, question: str) -> RoutingDecision:
+        ranked = sorted(self.scores(question).items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return RoutingDecision(None, 0.0, None, 0.0, False)
+        best, best_score = ranked[0]
+        runner_up, runner_up_score = ranked[1] if len(ranked) > 1 else (None, 0.0)
+        confident = best_score >= self.min_score and best_score - runner_up_score >= self.min_margin
+        return RoutingDecision(
+            agent_slug=best if best_score > 0 else None,
+            score=best_score,
+            runner_up=runner_up,
+            runner_up_score=runner_up_score,
+            confident=confident,
+            scores=dict(ranked),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Persistent cache of routing decisions
+# ---------------------------------------------------------------------------
+
+ROUTING_CACHE_TTL = float(os.getenv("ROUTING_CACHE_TTL", str(7 * 24 * 3600)))
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS routing_cache (
+    fingerprint TEXT PRIMARY KEY,
+    config_version TEXT NOT NULL,
+    agent_slug TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+def question_fingerprint(question: str) -> str:
+    """Hash of the question with case, punctuation and whitespace normalised away."""
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def config_version(agents_dir: Path) -> str:
+    """Changes whenever an agent config is added, removed or edited."""
+    digest = hashlib.sha256()
+    for path in sorted(agents_dir.glob("*.yml")):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+class RoutingCache:
+    """Routing decisions keyed by question fingerprint, stored in the workflow's SQLite file.
+
+    Entries expire after `ttl` seconds and are ignored (then purged) as soon as any file in
+    the agent config directory changes. The async methods run SQLite and the config
+    directory scan in a worker thread so they never block the event loop.
+    """
+
+    def __init__(self, db_file: Path, agents_dir: Path, ttl: float = ROUTING_CACHE_TTL):
+        self.db_file = db_file
+        self.agents_dir = agents_dir
+        self.ttl = ttl
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_CREATE_TABLE)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file, timeout=5.0)
+
+    async def config_version(self) -> str:
+        """`config_version` of the agent config directory; pass it to `get` and `put`."""
+        return await asyncio.to_thread(config_version, self.agents_dir)
+
+    async def get(self, question: str, version: str) -> tuple[str, str] | None:
+        """(agent_slug, reason) of a fresh cached decision, or None."""
+        def select() -> tuple[str, str] | None:
+            with closing(self._connect()) as conn:
+                return conn.execute(
+                    "SELECT agent_slug, reason FROM routing_cache "
+                    "WHERE fingerprint = ? AND config_version = ? AND created_at > ?",
+                    (question_fingerprint(question), version, time.time() - self.ttl),
+                ).fetchone()
+
+        row = await asyncio.to_thread(select)
+        return (row[0], row[1]) if row else None
+
+    async def put(self, question: str, version: str, agent_slug: str, reason: str) -> None:
+        def upsert() -> None:
+            now = time.time()
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "DELETE FROM routing_cache WHERE config_version != ? OR created_at <= ?",
+                    (version, now - self.ttl),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO routing_cache VALUES (?, ?, ?, ?, ?)",
+                    (question_fingerprint(question), version, agent_slug, reason, now),
+                )
+
+        await asyncio.to_thread(upsert)
+
+    def clear(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM routing_cache")
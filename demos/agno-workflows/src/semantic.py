@@ -0,0 +1,165 @@
+"""Compact, queryable view of an agent's OSI semantic model files.
+
+`SemanticIndex.from_files` parses the osi.yml files once into datasets (source table, key
+and field expressions), metrics and relationships. `SemanticIndex.context(question)` then
+renders only the parts that share terms with the question — plus the metrics and joins
+that touch them and every domain-level rule — as a short Markdown block that is sent with
+the question, so the agent does not have to read the files through tool calls.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from routing import tokenize
+
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_QUALIFIED_NAME = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\.[A-Za-z_]")
+
+
+def _expression(item: dict) -> str:
+    """The ANSI_SQL expression of a field or metric (or the first dialect given)."""
+    expression = item.get("expression")
+    if not isinstance(expression, dict):
+        return str(expression or "")
+    dialects = expression.get("dialects") or []
+    for dialect in dialects:
+        if dialect.get("dialect") == "ANSI_SQL":
+            return str(dialect.get("expression", ""))
+    return str(dialects[0].get("expression", "")) if dialects else ""
+
+
+def _instructions(item: dict) -> str:
+    return str((item.get("ai_context") or {}).get("instructions") or "")
+
+
+def _local_name(name: str) -> str:
+    """'sales_domain.orders' → 'orders'"""
+    return name.rpartition(".")[2]
+
+
+@dataclass
+class Dataset:
+    name: str
+    lines: list[str]
+    terms: frozenset[str]
+
+
+@dataclass
+class Metric:
+    name: str
+    line: str
+    terms: frozenset[str]
+    datasets: frozenset[str]
+
+
+@dataclass
+class Relationship:
+    line: str
+    datasets: frozenset[str]
+
+
+@dataclass
+class SemanticIndex:
+    rules: list[str] = field(default_factory=list)
+    datasets: dict[str, Dataset] = field(default_factory=dict)
+    metrics: list[Metric] = field(default_factory=list)
+    relationships: list[Relationship] = field(default_factory=list)
+
+    @classmethod
+    def from_files(cls, paths: list[Path]) -> SemanticIndex:
+        index = cls()
+        for path in paths:
+            with open(path) as f:
+                document = yaml.load(f, Loader=_YamlLoader) or {}
+            for model in document.get("semantic_model") or []:
+                index._add_model(model)
+        return index
+
+    def _add_model(self, model: dict) -> None:
+        header = f"Model `{model.get('name', '')}`: {model.get('description', '')}".rstrip(": ")
+        rule = _instructions(model)
+        self.rules.append(f"{header}. {rule}" if rule else header)
+
+        for dataset in model.get("datasets") or []:
+            name = dataset["name"]
+            key = ", ".join(dataset.get("primary_key") or [])
+            lines = [
+                f"Dataset `{name}` → `{dataset.get('source', name)}`"
+                + (f" (key: {key})" if key else "")
+                + (f" — {dataset['description']}" if dataset.get("description") else "")
+            ]
+            if _instructions(dataset):
+                lines.append(f"  Note: {_instructions(dataset)}")
+            synonyms = (dataset.get("ai_context") or {}).get("synonyms") or []
+            text = [name, dataset.get("source", ""), dataset.get("description", ""), " ".join(synonyms)]
+            for item in dataset.get("fields") or []:
+                expression = _expression(item)
+                line = f"  - {item['name']}"
+                if expression and expression != item["name"]:
+                    line += f" = {expression}"
+                if (item.get("dimension") or {}).get("is_time"):
+                    line += " (time)"
+                if item.get("description"):
+                    line += f" — {item['description']}"
+                lines.append(line)
+                text += [item["name"], expression, item.get("description", "")]
+            self.datasets[name] = Dataset(name, lines, frozenset(tokenize(" ".join(text))))
+
+        for metric in model.get("metrics") or []:
+            expression = _expression(metric)
+            line = f"- {metric['name']} = {expression}"
+            if metric.get("description"):
+                line += f" — {metric['description']}"
+            if _instructions(metric):
+                line += f" Note: {_instructions(metric)}"
+            text = " ".join([metric["name"], metric.get("description", ""), _instructions(metric)])
+            self.metrics.append(Metric(
+                name=metric["name"],
+                line=line,
+                terms=frozenset(tokenize(text)),
+                datasets=frozenset(_QUALIFIED_NAME.findall(expression)),
+            ))
+
+        for relationship in model.get("relationships") or []:
+            source, target = relationship["from"], relationship["to"]
+            pairs = zip(relationship.get("from_columns") or [], relationship.get("to_columns") or [])
+            condition = " AND ".join(f"{source}.{a} = {target}.{b}" for a, b in pairs)
+            line = f"- {condition} ({relationship.get('name', '')})"
+            if _instructions(relationship):
+                line += f" Note: {_instructions(relationship)}"
+            self.relationships.append(Relationship(line, frozenset({_local_name(source), _local_name(target)})))
+
+    def context(self, question: str) -> str:
+        """Markdown with the domain rules and the datasets, metrics and joins relevant to `question`.
+
+        Falls back to the whole model when nothing in it matches the question.
+        """
+        terms = set(tokenize(question))
+        datasets = {name for name, dataset in self.datasets.items() if terms & dataset.terms}
+        metrics = [metric for metric in self.metrics if terms & metric.terms]
+        for metric in metrics:
+            datasets |= metric.datasets & self.datasets.keys()
+        if not datasets and not metrics:
+            datasets = set(self.datasets)
+        metrics += [m for m in self.metrics if m not in metrics and m.datasets & datasets]
+        relationships = [r for r in self.relationships if r.datasets & datasets]
+
+        lines = ["### Rules", *(f"- {rule}" for rule in self.rules)]
+        if datasets:
+            lines += ["", "### Datasets (field = SQL expression)"]
+            for name in self.datasets:
+                if name in datasets:
+                    lines += self.datasets[name].lines
+        if metrics:
+            lines += ["", "### Metrics", *(metric.line for metric in metrics)]
+        if relationships:
+            lines += ["", "### Joins", *(relationship.line for relationship in relationships)]
+        omitted = [name for name in self.datasets if name not in datasets]
+        if omitted:
+            lines += ["", f"Not shown (read the semantic model files if needed): {', '.join(omitted)}"]
+        return "\n".join(lines)
@@ -3,7 +3,7 @@ import logging
 logging.basicConfig(level=logging.DEBUG)
 
 from agno.os import AgentOS
-from workflow import build_all_agents, workflow
+from workflow import build_agentos_agents, workflow
 
-agent_os = AgentOS(agents=build_all_agents(), workflows=[workflow], tracing=True)
+agent_os = AgentOS(agents=build_agentos_agents(), workflows=[workflow], tracing=True)
 app = agent_os.get_app()
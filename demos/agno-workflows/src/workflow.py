@@ -1,14 +1,20 @@
 """Agno Workflows tech demo — standalone, no Portal dependency.
 
 Steps:
-  1. identify_agent  — Agent with FileTools reads YAML configs, returns AgentSelection
-  Condition: check_access — evaluator reads access.yml; if denied →
+  1. identify_agent  — local TF-IDF router picks the agent; ambiguous questions fall back to
+                       an LLM Agent that returns AgentSelection
+  Condition: check_access — evaluator looks the user up in the access store; if denied →
     2. request_access — requires_confirmation; on_reject=cancel
-  3. answer_question  — executor picks the agent from session_state and streams its response
+  3. answer_question  — executor picks the agent from session_state and sends it the question
+                       with the relevant part of its semantic model
 """
 
 from __future__ import annotations
 
+import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 import yaml
@@ -20,31 +26,42 @@ from agno.tools.postgres import PostgresTools
 from agno.workflow import Condition, OnReject, Step, StepInput, StepOutput, Workflow
 from pydantic import BaseModel, Field
 
+from access import ACCESS_STORE, open_access_store
+from routing import AgentRouter, RoutingCache
+from semantic import SemanticIndex
+
 # ---------------------------------------------------------------------------
 # Paths (resolved relative to this file so the demo works from any cwd)
 # ---------------------------------------------------------------------------
 
 _DEMO_ROOT = Path(__file__).parent.parent
-_AGENTS_DIR = _DEMO_ROOT / "config" / "agents"
+_AGENTS_DIR = Path(os.getenv("AGENTS_DIR", _DEMO_ROOT / "config" / "agents"))
 _ACCESS_FILE = _DEMO_ROOT / "config" / "access.yml"
 _PRODUCTS_DIR = _DEMO_ROOT / "products"
+_STATE_DB_FILE = _DEMO_ROOT / "data" / "workflow_state.db"
 
 HARDCODED_USER = "demo_user"
 
+# Built agents kept in memory; the least recently used and idle ones are closed and dropped
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "32"))
+AGENT_IDLE_SECONDS = float(os.getenv("AGENT_IDLE_SECONDS", "900"))
+# Comma-separated agent slugs to register with AgentOS, or "all". None by default: the
+# workflow builds agents on demand, so the server starts without building any
+AGENTOS_AGENTS = os.getenv("AGENTOS_AGENTS", "")
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
-def _load_yaml(path: Path) -> dict:
-    with open(path) as f:
-        return yaml.safe_load(f)
+# libyaml's loader is several times faster; startup parses every agent config
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
-def _save_yaml(path: Path, data: dict) -> None:
-    with open(path, "w") as f:
-        yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+def _load_yaml(path: Path) -> dict:
+    with open(path) as f:
+        return yaml.load(f, Loader=_YamlLoader)
 
 
 def _build_instructions(config: dict, agent_slug: str) -> str:
@@ -70,22 +87,31 @@ def _build_instructions(config: dict, agent_slug: str) -> str:
     else:
         schema_restriction = ""
 
+    if ACCESS_STORE == "sqlite":
+        # Grants live in the workflow's SQLite file, which the agent cannot read
+        access_control = "Access to this agent is checked by the data access workflow before you are called.\n"
+    else:
+        access_control = (
+            f"Before answering any data question, read config/access.yml and check whether `{HARDCODED_USER}` "
+            f"is listed under `accessible_agents` for agent `{agent_slug}`. "
+            f"If not, respond: \"You don't have access to {name}. Please request access through the portal.\" "
+            f"Do not query the database or read any semantic model files in that case.\n"
+        )
+
     return f"""You are {name}, a data expert for the {description} product.
 
 ## Access Control
 
-Before answering any data question, read config/access.yml and check whether `{HARDCODED_USER}` \
-is listed under `accessible_agents` for agent `{agent_slug}`. \
-If not, respond: "You don't have access to {name}. Please request access through the portal." \
-Do not query the database or read any semantic model files in that case.
-
+{access_control}
 ## Semantic Models
 {osi_file_list or "  (none)"}
 
 {product_context}
 {schema_restriction}## Protocol (every data question)
-1. Read all relevant semantic model files first.
-2. Extract field expressions, metric formulas, domain instructions, and join conditions.
+1. Use the semantic model context sent with the question (rules, field expressions, metric \
+formulas, join conditions). Only read a semantic model file above if something you need is \
+listed as not shown, or if no context was sent.
+2. Apply the domain rules and field expressions exactly as given.
 3. Query the database using only what the models define — never guess column names.
 4. Cite which semantic rule or metric you applied.
 5. If a user assumption contradicts the data, correct it with the actual figure.
@@ -108,9 +134,11 @@ def _fix_tool_schemas(agent: Agent) -> None:
                     prop["type"] = "string"
 
 
-def _build_agent(agent_name: str) -> Agent:
-    """Build a single Agent from its YAML config file."""
-    config = _load_yaml(_AGENTS_DIR / f"{agent_name}.yml")
+def _build_agent(agent_name: str) -> tuple[Agent, SemanticIndex]:
+    """Build a single Agent from its YAML config file, with its OSI files parsed once into
+    datasets, metrics and joins."""
+    config = _agent_configs[agent_name]
+    semantic = SemanticIndex.from_files([_DEMO_ROOT / f for f in config.get("osi_files", [])])
     pg = config["postgres"]
     osi_files = list(config.get("osi_files", []))
     config_for_instructions = {**config, "osi_files": osi_files}
@@ -133,18 +161,113 @@ def _build_agent(agent_name: str) -> Agent:
         markdown=True,
     )
     _fix_tool_schemas(agent)
-    return agent
-
-
-# Build all agents once at module load — shared between AgentOS and the workflow
-_agents: dict[str, Agent] = {name: _build_agent(name) for name in _list_agent_names()}
-
-
-def build_all_agents() -> list[Agent]:
-    """Return all agents — used by AgentOS."""
-    return list(_agents.values())
+    return agent, semantic
 
 
+def _close_agent(agent: Agent) -> None:
+    """Close the Postgres connection of an evicted agent (PostgresTools reconnects on next use)."""
+    for toolkit in getattr(agent, "tools", []) or []:
+        if isinstance(toolkit, PostgresTools):
+            toolkit.close()
+
+
+class _CachedAgent:
+    def __init__(self, agent: Agent, semantic: SemanticIndex):
+        self.agent = agent
+        # Lives and is evicted with the agent, so a cached agent never re-parses its OSI files
+        self.semantic = semantic
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self.pinned = False
+
+
+class AgentCache:
+    """Agents built on first use and kept in a bounded LRU.
+
+    Beyond `max_size` entries the least recently used agent is evicted, and agents not used
+    for `idle_seconds` are evicted on the next access. Agents leased through `acquire` are
+    never evicted until released; pinned agents (those registered with AgentOS, which runs
+    them without going through the cache) are never evicted and do not count towards
+    `max_size`.
+    """
+
+    def __init__(self, build, max_size: int = AGENT_CACHE_SIZE, idle_seconds: float = AGENT_IDLE_SECONDS):
+        self._build = build
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._entries: OrderedDict[str, _CachedAgent] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _checkout(self, agent_name: str, lease: bool = False, pin: bool = False) -> _CachedAgent:
+        with self._lock:
+            entry = self._entries.get(agent_name)
+            if entry is None:
+                entry = self._entries[agent_name] = _CachedAgent(*self._build(agent_name))
+            self._entries.move_to_end(agent_name)
+            entry.last_used = time.monotonic()
+            entry.in_use += lease
+            entry.pinned = entry.pinned or pin
+            self._evict(keep=agent_name)
+            return entry
+
+    def get(self, agent_name: str) -> Agent:
+        return self._checkout(agent_name).agent
+
+    def acquire(self, agent_name: str) -> tuple[Agent, SemanticIndex]:
+        """Lease an agent, with its semantic model, until `release`."""
+        entry = self._checkout(agent_name, lease=True)
+        return entry.agent, entry.semantic
+
+    def pin(self, agent_name: str) -> Agent:
+        """Build (or reuse) an agent and keep it for the life of the process."""
+        return self._checkout(agent_name, pin=True).agent
+
+    def release(self, agent_name: str) -> None:
+        with self._lock:
+            entry = self._entries.get(agent_name)
+            if entry is not None:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def _evict(self, keep: str) -> None:
+        idle_before = time.monotonic() - self.idle_seconds
+        overflow = sum(not entry.pinned for entry in self._entries.values()) - self.max_size
+        for name, entry in list(self._entries.items()):
+            if name == keep or entry.in_use or entry.pinned:
+                continue
+            if overflow > 0 or entry.last_used < idle_before:
+                del self._entries[name]
+                _close_agent(entry.agent)
+                overflow -= 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Configs are parsed once at module load; agents are only built when first needed
+_agent_configs: dict[str, dict] = {name: _load_yaml(_AGENTS_DIR / f"{name}.yml") for name in _list_agent_names()}
+_agent_cache = AgentCache(_build_agent)
+
+# Keyword index over the same configs, used by identify_agent before any LLM call
+_router = AgentRouter(_agent_configs)
+# LLM routing decisions, remembered next to the workflow state until config/agents/ changes
+_routing_cache = RoutingCache(_STATE_DB_FILE, _AGENTS_DIR)
+# access.yml indexed in memory (or the SQLite table with ACCESS_STORE=sqlite)
+_access = open_access_store(_ACCESS_FILE, _STATE_DB_FILE)
+
+
+def build_agentos_agents() -> list[Agent]:
+    """Return the agents listed in AGENTOS_AGENTS ("all" for every agent), to register with AgentOS.
+
+    AgentOS needs Agent objects up front, so these are built at server start and pinned in
+    the cache: AgentOS runs them directly, so evicting one would close its connection
+    mid-run and make the workflow build a second agent with the same id. Keep the list
+    short; the workflow reaches every agent lazily through the cache either way.
+    """
+    names = [name.strip() for name in AGENTOS_AGENTS.split(",") if name.strip()]
+    if names == ["all"]:
+        names = list(_agent_configs)
+    return [_agent_cache.pin(name) for name in names if name in _agent_configs]
 
 
 # ---------------------------------------------------------------------------
@@ -161,9 +284,12 @@ identify_agent = Agent(
     name="Agent Selector",
     description="Reads available agent configs and picks the best one for a question.",
     instructions=(
-        f"You are a routing agent. The agent config files are in {_AGENTS_DIR}. "
-        "List the YAML files there, read each one, then pick the single most relevant agent "
-        "for the user's question. Return the filename stem (without .yml) as agent_slug."
+        "You are a routing agent. Pick the single most relevant agent for the user's question "
+        "from the list below and return its slug as agent_slug.\n\n"
+        + "\n".join(
+            f"- {slug}: {config['name']} — {config.get('description', '')}"
+            for slug, config in _agent_configs.items()
+        )
     ),
     # tools=[FileTools(_AGENTS_DIR)],
     output_schema=AgentSelection,
@@ -172,12 +298,43 @@ identify_agent = Agent(
 _fix_tool_schemas(identify_agent)
 
 
+async def identify_agent_executor(step_input: StepInput, session_state: dict) -> StepOutput:
+    """Route with the local index; only ambiguous questions pay for the LLM selector,
+    and only the first time they are asked."""
+    question = str(step_input.input)
+    decision = _router.route(question)
+    if decision.confident:
+        session_state["routing"] = "keyword"
+        selection = AgentSelection(agent_slug=decision.agent_slug, reason=decision.reason)
+        return StepOutput(content=selection, success=True)
+
+    # Computed once so the lookup and the stored decision agree on the configs they saw
+    version = await _routing_cache.config_version()
+    cached = await _routing_cache.get(question, version)
+    if cached is not None:
+        session_state["routing"] = "cache"
+        return StepOutput(content=AgentSelection(agent_slug=cached[0], reason=cached[1]), success=True)
+
+    session_state["routing"] = "llm"
+    candidates = ", ".join(slug for slug, score in decision.scores.items() if score > 0)
+    hint = f"\n\nClosest agent configs by keyword: {candidates}." if candidates else ""
+    response = await identify_agent.arun(question + hint)
+    content = response.content
+    selection = (
+        AgentSelection.model_validate_json(content) if isinstance(content, str)
+        else AgentSelection.model_validate(content)
+    )
+    if selection.agent_slug.strip().lower() in _agent_configs:
+        await _routing_cache.put(question, version, selection.agent_slug.strip().lower(), selection.reason)
+    return StepOutput(content=selection, success=True)
+
+
 # ---------------------------------------------------------------------------
 # Condition: check_access
 # ---------------------------------------------------------------------------
 
 
-def check_access_evaluator(step_input: StepInput, session_state: dict) -> bool:
+async def check_access_evaluator(step_input: StepInput, session_state: dict) -> bool:
     content = step_input.previous_step_content
     if isinstance(content, str):
         selection = AgentSelection.model_validate_json(content)
@@ -185,13 +342,7 @@ def check_access_evaluator(step_input: StepInput, session_state: dict) -> bool:
         selection = AgentSelection.model_validate(content)
     agent_name = selection.agent_slug.strip().lower()
     session_state["selected_agent"] = agent_name  # needed by downstream steps
-    access_data = _load_yaml(_ACCESS_FILE)
-    accessible = (
-        access_data.get("users", {})
-        .get(HARDCODED_USER, {})
-        .get("accessible_agents", [])
-    )
-    return agent_name not in accessible
+    return not await _access.has_access(HARDCODED_USER, agent_name)
 
 
 # ---------------------------------------------------------------------------
@@ -199,17 +350,9 @@ def check_access_evaluator(step_input: StepInput, session_state: dict) -> bool:
 # ---------------------------------------------------------------------------
 
 
-def grant_access_executor(step_input: StepInput, session_state: dict) -> StepOutput:
+async def grant_access_executor(step_input: StepInput, session_state: dict) -> StepOutput:
     agent_name = session_state.get("selected_agent", "")
-    access_data = _load_yaml(_ACCESS_FILE)
-    accessible = (
-        access_data.setdefault("users", {})
-        .setdefault(HARDCODED_USER, {})
-        .setdefault("accessible_agents", [])
-    )
-    if agent_name not in accessible:
-        accessible.append(agent_name)
-    _save_yaml(_ACCESS_FILE, access_data)
+    await _access.grant(HARDCODED_USER, agent_name)
     return StepOutput(content=f"Access granted to `{agent_name}`. Proceeding.", success=True)
 
 
@@ -220,11 +363,17 @@ def grant_access_executor(step_input: StepInput, session_state: dict) -> StepOut
 
 async def answer_question_executor(step_input: StepInput, session_state: dict) -> StepOutput:
     agent_name = session_state.get("selected_agent")
-    agent = _agents.get(agent_name)
-    if agent is None:
+    if agent_name not in _agent_configs:
         return StepOutput(content=f"No agent found for '{agent_name}'", success=False)
 
-    response = await agent.arun(step_input.input)
+    # Send the relevant part of the semantic model along, so the agent need not read the files
+    question = str(step_input.input)
+    agent, semantic = _agent_cache.acquire(agent_name)
+    try:
+        context = semantic.context(question)
+        response = await agent.arun(f"{question}\n\n<semantic_model>\n{context}\n</semantic_model>")
+    finally:
+        _agent_cache.release(agent_name)
 
     answer: str = ""
     if response is not None:
@@ -259,7 +408,7 @@ workflow = Workflow(
         "optionally requests it, then answers using a dynamically built Team."
     ),
     steps=[
-        Step(name="identify_agent", agent=identify_agent),
+        Step(name="identify_agent", executor=identify_agent_executor),
         Condition(
             name="check_access",
             evaluator=check_access_evaluator,
@@ -270,5 +419,5 @@ workflow = Workflow(
         Step(name="answer_question", executor=answer_question_executor),
     ],
     session_state={},
-    db=SqliteDb(db_file=str(_DEMO_ROOT / "data" / "workflow_state.db")),
+    db=SqliteDb(db_file=str(_STATE_DB_FILE)),
 )
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Load test the MCP server with many concurrent simulated clients.
+
+Starts server.py with MCP_TRANSPORT=http against the database configured through the
+usual DB_* environment variables (the docker-compose Postgres with the dbt seeds loaded
+by default), or targets an already running server with --url. Every simulated client
+opens its own MCP session and calls a weighted mix of tools back to back for --duration
+seconds. Reports p50/p95/p99 latency and throughput per tool, the number of server
+connections seen in pg_stat_activity, and optionally compares against an earlier run.
+
+    DB_NAME=employee_db DB_USER=user DB_PASSWORD=pass python benchmarks/bench_load.py \\
+        --clients 20 --duration 30 --output load.json
+    python benchmarks/bench_load.py --baseline load.json   # later, after a change
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import asyncpg
+from fastmcp import Client
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+SERVER_PATH = Path(__file__).resolve().parent.parent / "server.py"
+
+CONNECTIONS_QUERY = """
+SELECT count(*) as total, count(*) FILTER (WHERE state = 'active') as active
+FROM pg_stat_activity
+WHERE application_name = 'mcp_postgres_server'
+"""
+
+
+def tool_calls(args):
+    """Arguments of every tool in the mix, based on the dbt seed tables by default"""
+    schema_name, _, table_name = args.stats_table.rpartition(".")
+    return {
+        "list_tables": {},
+        "execute_query": {"query": args.query, "limit": 100},
+        "get_table_statistics": {"table_name": table_name, "schema_name": schema_name or "public"},
+        "search_table": {"table_name": args.search_table, "column_name": args.search_column,
+                         "search_term": args.search_term, "limit": 20},
+    }
+
+
+def parse_mix(mix: str):
+    weights = {}
+    for item in mix.split(","):
+        tool, _, weight = item.partition("=")
+        weights[tool.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values, fraction: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def result_is_error(result) -> bool:
+    """Tool errors come back as a dict with an "error" key (or status "error")"""
+    payload = getattr(result, "structured_content", None) or getattr(result, "data", None)
+    if payload is None:
+        content = getattr(result, "content", result)
+        try:
+            payload = json.loads(content[0].text)
+        except (AttributeError, IndexError, TypeError, ValueError):
+            return bool(getattr(result, "is_error", False))
+    if isinstance(payload, dict) and isinstance(payload.get("result"), dict):
+        payload = payload["result"]
+    return isinstance(payload, dict) and ("error" in payload or payload.get("status") == "error")
+
+
+async def run_client(url: str, calls, weights, deadline: float, warmup_until: float, seed: int, samples):
+    rng = random.Random(seed)
+    tools = list(weights)
+    tool_weights = [weights[tool] for tool in tools]
+    async with Client(url) as client:
+        while time.monotonic() < deadline:
+            tool = rng.choices(tools, tool_weights)[0]
+            start = time.monotonic()
+            try:
+                error = result_is_error(await client.call_tool(tool, calls[tool]))
+            except Exception:
+                error = True
+            end = time.monotonic()
+            if start >= warmup_until:
+                samples.append((tool, end - start, error))
+
+
+async def sample_connections(stop: asyncio.Event, interval: float):
+    conn = await asyncpg.connect(host=server.DB_HOST, port=server.DB_PORT, database=server.DB_NAME,
+                                 user=server.DB_USER, password=server.DB_PASSWORD)
+    totals, actives = [], []
+    try:
+        while not stop.is_set():
+            row = await conn.fetchrow(CONNECTIONS_QUERY)
+            totals.append(row["total"])
+            actives.append(row["active"])
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await conn.close()
+    return {
+        "samples": len(totals),
+        "max_connections": max(totals, default=0),
+        "mean_connections": round(sum(totals) / len(totals), 2) if totals else 0,
+        "max_active": max(actives, default=0),
+        "mean_active": round(sum(actives) / len(actives), 2) if actives else 0,
+    }
+
+
+def summarize(samples, measured_seconds: float):
+    per_tool = {}
+    for tool in sorted({tool for tool, _, _ in samples}) + ["all"]:
+        latencies = sorted(latency for name, latency, _ in samples if tool in ("all", name))
+        errors = sum(1 for name, _, error in samples if error and tool in ("all", name))
+        per_tool[tool] = {
+            "calls": len(latencies),
+            "errors": errors,
+            "throughput_per_second": round(len(latencies) / measured_seconds, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        }
+    return per_tool
+
+
+def wait_for_server(port: int, process, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server.py exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server.py did not start listening on port {port} within {timeout}s")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=SERVER_PATH.parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f"{report['clients']} clients, {report['measured_seconds']}s measured")
+    print(f"{'tool':<22}{'calls':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for tool, stats in report["tools"].items():
+        line = (f"{tool:<22}{stats['calls']:>8}{stats['errors']:>8}{stats['throughput_per_second']:>9.1f}"
+                f"{stats['p50_ms'] or 0:>10.1f}{stats['p95_ms'] or 0:>10.1f}{stats['p99_ms'] or 0:>10.1f}")
+        before = (baseline or {}).get("tools", {}).get(tool)
+        if before and before.get("p95_ms") and stats["p95_ms"]:
+            line += (f"   p95 {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:+.1f}%"
+                     f"  req/s {(stats['throughput_per_second'] / before['throughput_per_second'] - 1) * 100:+.1f}%")
+        print(line)
+    connections = report["connections"]
+    print(f"connections: max {connections['max_connections']} (mean {connections['mean_connections']}), "
+          f"active max {connections['max_active']} (mean {connections['mean_active']})")
+
+
+async def main(args):
+    weights = parse_mix(args.mix)
+    calls = tool_calls(args)
+    unknown = [tool for tool in weights if tool not in calls]
+    if unknown:
+        raise SystemExit(f"Unknown tools in --mix: {', '.join(unknown)} (choose from {', '.join(calls)})")
+
+    process = None
+    url = args.url
+    if url is None:
+        env = {**os.environ, "MCP_TRANSPORT": "http", "MCP_HOST": "127.0.0.1", "MCP_PORT": str(args.port)}
+        process = subprocess.Popen([sys.executable, str(SERVER_PATH)], env=env,
+                                   stdout=subprocess.DEVNULL, stderr=None if args.server_logs else subprocess.DEVNULL)
+        url = f"http://127.0.0.1:{args.port}/mcp/"
+    try:
+        if process is not None:
+            wait_for_server(args.port, process)
+        print(f"Driving {url} with {args.clients} clients for {args.duration}s (+{args.warmup}s warmup)...")
+
+        samples = []
+        stop = asyncio.Event()
+        connections_task = asyncio.create_task(sample_connections(stop, args.sample_interval))
+        start = time.monotonic()
+        warmup_until = start + args.warmup
+        deadline = warmup_until + args.duration
+        client_results = await asyncio.gather(*[
+            run_client(url, calls, weights, deadline, warmup_until, args.seed + i, samples)
+            for i in range(args.clients)
+        ], return_exceptions=True)
+        measured_seconds = max(time.monotonic() - warmup_until, 1e-9)
+        stop.set()
+        connections = await connections_task
+        failed_clients = [repr(result) for result in client_results if isinstance(result, Exception)]
+
+        async with Client(url) as client:
+            status = await client.call_tool("get_server_status", {})
+        status = getattr(status, "structured_content", None) or getattr(status, "data", None)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "clients": args.clients,
+        "duration_seconds": args.duration,
+        "measured_seconds": round(measured_seconds, 2),
+        "mix": weights,
+        "tool_arguments": calls,
+        "tools": summarize(samples, measured_seconds),
+        "connections": connections,
+        "failed_clients": failed_clients,
+        "server_status": status if isinstance(status, dict) else None,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if failed_clients:
+        print(f"{len(failed_clients)} clients failed, first error: {failed_clients[0]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent simulated MCP clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of calls not counted")
+    parser.add_argument("--mix", default="list_tables=1,execute_query=5,get_table_statistics=1,search_table=2",
+                        help="Weighted tool mix, tool=weight,...")
+    parser.add_argument("--query", default="SELECT * FROM employees.salary ORDER BY amount DESC LIMIT 50")
+    parser.add_argument("--stats-table", default="employees.salary")
+    parser.add_argument("--search-table", default="employees.employee")
+    parser.add_argument("--search-column", default="last_name")
+    parser.add_argument("--search-term", default="son")
+    parser.add_argument("--url", help="Drive an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the server started by the benchmark")
+    parser.add_argument("--server-logs", action="store_true", help="Show the server's log output")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between pg_stat_activity samples")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="Earlier --output file to compare p95 latency and throughput against")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Compare payload size and encode time of the execute_query result formats.
+
+Builds a synthetic result shaped like what asyncpg returns for a wide fact table
+(ints, floats, numerics, short text, timestamps) and encodes it with every
+result_format supported by server.py, including the final JSON serialization the
+MCP layer performs. No database is needed.
+
+    python benchmarks/bench_result_encoding.py --rows 50000 --columns 20
+"""
+import argparse
+import datetime
+import json
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import RESULT_FORMATS, _json_default, encode_rows  # noqa: E402
+
+
+def make_rows(row_count: int, column_count: int, seed: int = 42):
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    makers = [
+        lambda: rng.randint(0, 1_000_000),
+        lambda: rng.random() * 1000,
+        lambda: Decimal(rng.randint(0, 10_000_000)) / 100,
+        lambda: rng.choice(["pending", "shipped", "delivered", "returned"]),
+        lambda: start + datetime.timedelta(seconds=rng.randint(0, 31_536_000)),
+    ]
+    names = [f"column_{i:02d}" for i in range(column_count)]
+    return [
+        {name: makers[i % len(makers)]() for i, name in enumerate(names)}
+        for _ in range(row_count)
+    ]
+
+
+def bench_format(rows, result_format: str, repeats: int):
+    timings = []
+    payload = b""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        payload = json.dumps(encode_rows(rows, result_format), default=_json_default).encode("utf-8")
+        timings.append(time.perf_counter() - start)
+    return {
+        "format": result_format,
+        "bytes": len(payload),
+        "encode_ms_median": round(statistics.median(timings) * 1000, 2),
+        "encode_ms_min": round(min(timings) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.columns)
+    results = []
+    for result_format in RESULT_FORMATS:
+        try:
+            results.append(bench_format(rows, result_format, args.repeats))
+        except RuntimeError as e:
+            print(f"Skipping {result_format}: {e}")
+
+    baseline = next(r for r in results if r["format"] == "rows")
+    print(f"{args.rows} rows x {args.columns} columns, {args.repeats} repeats")
+    print(f"{'format':<14}{'bytes':>14}{'vs rows':>10}{'median ms':>12}{'min ms':>10}")
+    for r in results:
+        r["size_ratio"] = round(r["bytes"] / baseline["bytes"], 3)
+        print(f"{r['format']:<14}{r['bytes']:>14,}{r['size_ratio']:>10.3f}"
+              f"{r['encode_ms_median']:>12.2f}{r['encode_ms_min']:>10.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "columns": args.columns, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
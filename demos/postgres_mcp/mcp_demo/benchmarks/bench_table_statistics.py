@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""End-to-end latency of get_table_statistics: serial vs. single-pass vs. concurrent.
+
+Creates a table with 50 numeric columns in the database configured through the usual
+DB_* environment variables, then times:
+  - serial:      the original per-column loop (MIN/MAX/AVG scan + OFFSET median per column)
+  - single_pass: get_table_statistics(parallelism=1), one aggregate over every column
+  - concurrent:  get_table_statistics(parallelism=N), column groups on N connections
+
+    DB_NAME=employee_db DB_USER=user DB_PASSWORD=pass python benchmarks/bench_table_statistics.py --rows 200000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+SCHEMA = "mcp_bench"
+TABLE = "wide_stats"
+
+
+def tool_fn(tool):
+    # Newer fastmcp versions wrap decorated tools in a FunctionTool object
+    return getattr(tool, "fn", tool)
+
+
+async def create_table(rows: int, columns: int):
+    kinds = ["(random() * 1000)::int", "random() * 1000", "(random() * 100000)::numeric(12, 2)"]
+    column_sql = ", ".join(f"{kinds[i % len(kinds)]} as c{i:02d}" for i in range(columns))
+    async with server.get_db_connection() as conn:
+        await conn.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+        await conn.execute(f"DROP TABLE IF EXISTS {SCHEMA}.{TABLE}")
+        await conn.execute(
+            f"CREATE TABLE {SCHEMA}.{TABLE} AS SELECT g as id, {column_sql} FROM generate_series(1, {rows}) g",
+            timeout=600,
+        )
+        await conn.execute(f"ANALYZE {SCHEMA}.{TABLE}")
+
+
+async def drop_table():
+    async with server.get_db_connection() as conn:
+        await conn.execute(f"DROP TABLE IF EXISTS {SCHEMA}.{TABLE}")
+
+
+async def serial_statistics(columns: int):
+    """The pre-rewrite implementation: two awaited scans per column, one after another"""
+    async with server.get_db_connection() as conn:
+        await conn.fetchval(f"SELECT COUNT(*) FROM {SCHEMA}.{TABLE}")
+        for i in range(columns):
+            col = f"c{i:02d}"
+            await conn.fetchrow(
+                f"SELECT MIN({col}), MAX({col}), AVG({col}), COUNT({col}) "
+                f"FROM {SCHEMA}.{TABLE} WHERE {col} IS NOT NULL",
+                timeout=600,
+            )
+            await conn.fetchrow(
+                f"SELECT {col} FROM {SCHEMA}.{TABLE} WHERE {col} IS NOT NULL ORDER BY {col} "
+                f"LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM {SCHEMA}.{TABLE} WHERE {col} IS NOT NULL)",
+                timeout=600,
+            )
+
+
+async def time_variant(name: str, run, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = await run()
+        timings.append(time.perf_counter() - start)
+        if isinstance(result, dict) and "error" in result:
+            raise RuntimeError(f"{name} failed: {result['error']}")
+    return {
+        "variant": name,
+        "median_seconds": round(statistics.median(timings), 4),
+        "min_seconds": round(min(timings), 4),
+        "max_seconds": round(max(timings), 4),
+    }
+
+
+async def main(args):
+    get_table_statistics = tool_fn(server.get_table_statistics)
+    results = []
+    try:
+        print(f"Creating {SCHEMA}.{TABLE} with {args.rows} rows x {args.columns} numeric columns...")
+        await create_table(args.rows, args.columns)
+
+        variants = [
+            ("single_pass", lambda: get_table_statistics(TABLE, SCHEMA, parallelism=1)),
+            (f"concurrent_x{args.parallelism}",
+             lambda: get_table_statistics(TABLE, SCHEMA, parallelism=args.parallelism)),
+        ]
+        if not args.skip_serial:
+            variants.insert(0, ("serial", lambda: serial_statistics(args.columns)))
+
+        for name, run in variants:
+            result = await time_variant(name, run, args.repeats)
+            results.append(result)
+            print(f"{name:<16} median {result['median_seconds']:>9.3f}s  "
+                  f"min {result['min_seconds']:>9.3f}s  max {result['max_seconds']:>9.3f}s")
+    finally:
+        if not args.keep:
+            await drop_table()
+        await server.close_all_pools()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "columns": args.columns, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--columns", type=int, default=50)
+    parser.add_argument("--parallelism", type=int, default=server.STATS_MAX_PARALLEL)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--skip-serial", action="store_true", help="Skip the slow per-column baseline")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark table afterwards")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -2,10 +2,27 @@
 import os
 import asyncio
 import asyncpg
+import base64
+import datetime
+import functools
+import gzip
+import hashlib
+import itertools
+import json
 import logging
+import random
+import re
+import secrets
 import sys
-from typing import Any, Dict, List, Optional
-from fastmcp import FastMCP
+import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set, Tuple
+from fastmcp import Context, FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
 # Set up logging with less verbose output for production
 logging.basicConfig(
@@ -24,16 +41,139 @@ DB_NAME = os.getenv("DB_NAME", "postgres")
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 
-async def get_db_connection(database_name: str = None):
-    """Get a database connection with proper error handling"""
-    db_name = database_name or DB_NAME
+# Transport - stdio for editor integrations, or "http" to serve MCP (and /metrics) over HTTP
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("MCP_PORT", "8000"))
+
+# Connection pool configuration - one lazily-created pool per database
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_MAX_INACTIVE_LIFETIME = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))
+DB_POOL_IDLE_EVICTION = float(os.getenv("DB_POOL_IDLE_EVICTION", "900"))
+
+# Explicitly prepared statements, cached per pooled connection so parametrized catalog
+# and search queries are parsed and planned once per connection instead of once per call.
+# Set DB_STATEMENT_CACHE_SIZE=0 when running behind a transaction-mode pgbouncer
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+_statement_stats = {"prepares": 0, "executions": 0, "invalidated": 0}
+
+class StatementCachingConnection(asyncpg.Connection):
+    """asyncpg connection that keeps an LRU of explicitly prepared statements"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prepared: "OrderedDict[str, asyncpg.prepared_stmt.PreparedStatement]" = OrderedDict()
+
+    async def _prepared_statement(self, query: str):
+        statement = self._prepared.get(query)
+        if statement is not None:
+            self._prepared.move_to_end(query)
+            if statement._con_release_ctr != self._pool_release_ctr:
+                # A PreparedStatement only works during the pool checkout that created it;
+                # the server-side statement survives the release, so rewrap it for this one
+                statement = asyncpg.prepared_stmt.PreparedStatement(self, query, statement._state)
+                self._prepared[query] = statement
+            return statement
+        statement = await self.prepare(query)
+        _statement_stats["prepares"] += 1
+        self._prepared[query] = statement
+        if len(self._prepared) > DB_STATEMENT_CACHE_SIZE:
+            self._prepared.popitem(last=False)
+        return statement
+
+    async def _run_prepared(self, method: str, query: str, args: tuple):
+        if DB_STATEMENT_CACHE_SIZE <= 0:
+            return await getattr(self, method)(query, *args)
+        statement = await self._prepared_statement(query)
+        _statement_stats["executions"] += 1
+        try:
+            return await getattr(statement, method)(*args)
+        except asyncpg.exceptions.InvalidCachedStatementError:
+            # DDL changed the result type of the statement; prepare it again once
+            _statement_stats["invalidated"] += 1
+            self._prepared.pop(query, None)
+            statement = await self._prepared_statement(query)
+            return await getattr(statement, method)(*args)
+
+    async def fetch_prepared(self, query: str, *args) -> List[asyncpg.Record]:
+        return await self._run_prepared("fetch", query, args)
+
+    async def fetchrow_prepared(self, query: str, *args) -> Optional[asyncpg.Record]:
+        return await self._run_prepared("fetchrow", query, args)
+
+    async def fetchval_prepared(self, query: str, *args) -> Any:
+        return await self._run_prepared("fetchval", query, args)
+
+def get_statement_status() -> Dict[str, Any]:
+    executions = _statement_stats["executions"]
+    return {
+        **_statement_stats,
+        "reuse_ratio": round(1 - _statement_stats["prepares"] / executions, 4) if executions else None,
+        "cache_size_per_connection": DB_STATEMENT_CACHE_SIZE
+    }
+
+# Per-session database context - switch_database only changes the database of the MCP
+# session that called it; DB_NAME stays the default for new sessions and for calls made
+# outside an MCP request (startup checks, benchmarks)
+try:
+    from fastmcp.server.dependencies import get_context
+except ImportError:  # older fastmcp releases
+    get_context = None
+
+_session_databases: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+def _mcp_session() -> Optional[Any]:
+    """The MCP session of the tool call running in the current context, if any"""
+    if get_context is None:
+        return None
     try:
-        return await asyncpg.connect(
-            host=DB_HOST,
-            port=DB_PORT,
+        return get_context().session
+    except (RuntimeError, ValueError, AttributeError):
+        return None
+
+def current_database() -> str:
+    """Database the calling MCP session works in"""
+    session = _mcp_session()
+    if session is None:
+        return DB_NAME
+    return _session_databases.get(session, DB_NAME)
+
+def set_current_database(database_name: str) -> bool:
+    """Point the calling session at another database; returns False when there is no
+    MCP session and the server-wide default was changed instead"""
+    global DB_NAME
+    session = _mcp_session()
+    if session is None:
+        DB_NAME = database_name
+        return False
+    _session_databases[session] = database_name
+    return True
+
+# Pools are keyed by (database, replica endpoint), with None for the primary
+_pools: Dict[Tuple[str, Optional[str]], asyncpg.Pool] = {}
+_pool_last_used: Dict[Tuple[str, Optional[str]], float] = {}
+_pool_lock = asyncio.Lock()
+# Pools created for query_many_databases targets: they keep no idle connections and are
+# closed when the fan-out finishes, so a wide fan-out does not leave a backend per database
+_transient_pools: Set[Tuple[str, Optional[str]]] = set()
+
+async def _create_pool(db_name: str, host: str = DB_HOST, port: int = DB_PORT,
+                       min_size: int = DB_POOL_MIN_SIZE) -> asyncpg.Pool:
+    """Create a connection pool for a single database"""
+    try:
+        return await asyncpg.create_pool(
+            host=host,
+            port=port,
             database=db_name,
             user=DB_USER,
             password=DB_PASSWORD,
+            min_size=min_size,
+            max_size=pool_max_size(),
+            max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_LIFETIME,
+            connection_class=StatementCachingConnection,
+            statement_cache_size=max(DB_STATEMENT_CACHE_SIZE, 0),
             timeout=30.0,  # Increased timeout
             command_timeout=60.0,  # Command timeout
             server_settings={
@@ -47,16 +187,1342 @@ async def get_db_connection(database_name: str = None):
         logger.error(f"Database connection failed: {e}")
         raise
 
+async def _evict_idle_pools():
+    """Close pools of databases that are neither the default nor a session's current
+    database and have not been used for a while"""
+    now = time.monotonic()
+    in_use = {DB_NAME, *_session_databases.values()}
+    for key, pool in list(_pools.items()):
+        db_name, endpoint = key
+        if db_name in in_use:
+            continue
+        if now - _pool_last_used.get(key, now) < DB_POOL_IDLE_EVICTION:
+            continue
+        # Never close a pool that still has connections checked out
+        if pool.get_size() != pool.get_idle_size():
+            continue
+        _pools.pop(key, None)
+        _pool_last_used.pop(key, None)
+        _transient_pools.discard(key)
+        logger.info(f"Closing idle connection pool for database {db_name}{f' on {endpoint}' if endpoint else ''}")
+        await pool.close()
+
+async def get_pool(database_name: str = None, replica: Optional["Replica"] = None,
+                   transient: bool = False) -> asyncpg.Pool:
+    """Get (or lazily create) the connection pool for a database on the primary or a replica.
+    A pool created with transient=True keeps no idle connections; see close_transient_pools."""
+    db_name = database_name or current_database()
+    key = (db_name, replica.endpoint if replica else None)
+    pool = _pools.get(key)
+    if pool is None:
+        async with _pool_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                host, port = (replica.host, replica.port) if replica else (DB_HOST, DB_PORT)
+                pool = await _create_pool(db_name, host, port, 0 if transient else DB_POOL_MIN_SIZE)
+                _pools[key] = pool
+                if transient:
+                    _transient_pools.add(key)
+                logger.info(f"Created connection pool for database {db_name}{f' on {key[1]}' if replica else ''}")
+    _pool_last_used[key] = time.monotonic()
+    await _evict_idle_pools()
+    return pool
+
+async def close_transient_pools(databases: List[str]):
+    """Close the transient pools of databases, except those that have since become the default
+    or a session's database or still have connections checked out (those just age out)"""
+    in_use = {DB_NAME, *_session_databases.values()}
+    for key in [key for key in _transient_pools if key[0] in databases]:
+        _transient_pools.discard(key)
+        pool = _pools.get(key)
+        if pool is None or key[0] in in_use or pool.get_size() != pool.get_idle_size():
+            continue
+        _pools.pop(key, None)
+        _pool_last_used.pop(key, None)
+        await pool.close()
+
+# Read replicas - with DB_REPLICAS set, read-only query tools run on a replica picked by
+# least outstanding requests. A background health check ejects replicas that stop answering
+# (or, with REPLICA_MAX_LAG_SECONDS, fall too far behind) and re-admits them once they recover.
+# Catalog lookups, switch_database and everything else stay on the primary (DB_HOST).
+DB_REPLICAS = [endpoint.strip() for endpoint in os.getenv("DB_REPLICAS", "").split(",") if endpoint.strip()]
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "5"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "0"))
+
+# Replay lag; 0 when everything received has been replayed, so an idle primary does not look like lag
+REPLICA_HEALTH_QUERY = """
+SELECT
+    pg_is_in_recovery() as in_recovery,
+    CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END::float8 as lag_seconds
+"""
+
+class Replica:
+    """One read replica endpoint and its routing state"""
+
+    def __init__(self, endpoint: str):
+        host, _, port = endpoint.rpartition(":") if ":" in endpoint else (endpoint, "", "")
+        self.host = host
+        self.port = int(port) if port else DB_PORT
+        self.endpoint = f"{self.host}:{self.port}"
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.outstanding = 0
+        self.requests = 0
+        self.ejections = 0
+        self.last_error: Optional[str] = None
+        self.health_conn = None
+
+class ReplicaRouter:
+    """Least-outstanding-requests balancing over the healthy replicas"""
+
+    def __init__(self, endpoints: List[str], max_lag: float, check_interval: float):
+        self.replicas = [Replica(endpoint) for endpoint in endpoints]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.health_task: Optional[asyncio.Task] = None
+        self.primary_fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def _usable(self, replica: Replica) -> bool:
+        if not replica.healthy:
+            return False
+        return self.max_lag <= 0 or (replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag)
+
+    def choose(self) -> Optional[Replica]:
+        """The usable replica with the fewest requests in flight, or None for the primary"""
+        if not self.replicas:
+            return None
+        self._ensure_health_checks()
+        candidates = [replica for replica in self.replicas if self._usable(replica)]
+        if not candidates:
+            self.primary_fallbacks += 1
+            return None
+        replica = min(candidates, key=lambda r: (r.outstanding, r.requests))
+        replica.outstanding += 1
+        replica.requests += 1
+        return replica
+
+    def release(self, replica: Optional[Replica]):
+        if replica is not None:
+            replica.outstanding -= 1
+
+    def eject(self, replica: Replica, error: Exception):
+        if replica.healthy:
+            replica.ejections += 1
+            logger.warning(f"Ejecting read replica {replica.endpoint}: {error}")
+        replica.healthy = False
+        replica.last_error = str(error)
+
+    async def check(self, replica: Replica):
+        try:
+            if replica.health_conn is None or replica.health_conn.is_closed():
+                replica.health_conn = await asyncpg.connect(
+                    host=replica.host, port=replica.port, database=DB_NAME, user=DB_USER,
+                    password=DB_PASSWORD, timeout=5.0
+                )
+            row = await replica.health_conn.fetchrow(REPLICA_HEALTH_QUERY, timeout=5.0)
+        except Exception as e:
+            if replica.health_conn is not None:
+                replica.health_conn.terminate()
+                replica.health_conn = None
+            self.eject(replica, e)
+            return
+        if not row['in_recovery']:
+            logger.warning(f"Read replica {replica.endpoint} is not in recovery; is it a primary?")
+        replica.lag_seconds = row['lag_seconds']
+        if not replica.healthy:
+            logger.info(f"Read replica {replica.endpoint} is healthy again (lag {replica.lag_seconds:.1f}s)")
+        replica.healthy = True
+        replica.last_error = None
+
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.gather(*[self.check(replica) for replica in self.replicas])
+            await asyncio.sleep(self.check_interval)
+
+    def _ensure_health_checks(self):
+        if self.health_task is None or self.health_task.done():
+            self.health_task = asyncio.create_task(self._health_check_loop())
+
+    async def close(self):
+        if self.health_task is not None:
+            self.health_task.cancel()
+            self.health_task = None
+        for replica in self.replicas:
+            if replica.health_conn is not None:
+                await replica.health_conn.close()
+                replica.health_conn = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "max_lag_seconds": self.max_lag or None,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": {
+                replica.endpoint: {
+                    "healthy": replica.healthy,
+                    "usable": self._usable(replica),
+                    "lag_seconds": replica.lag_seconds,
+                    "outstanding": replica.outstanding,
+                    "requests": replica.requests,
+                    "ejections": replica.ejections,
+                    "last_error": replica.last_error
+                }
+                for replica in self.replicas
+            }
+        }
+
+replica_router = ReplicaRouter(DB_REPLICAS, REPLICA_MAX_LAG_SECONDS, REPLICA_HEALTH_CHECK_INTERVAL)
+
+# Replica each checked-out connection came from (by id), so a cancel reaches the same server
+_connection_replicas: Dict[int, Replica] = {}
+
+async def _acquire_pooled(db_name: str, replica: Optional[Replica], transient: bool) -> Tuple[asyncpg.Pool, Any]:
+    pool = await get_pool(db_name, replica, transient)
+    try:
+        return pool, await pool.acquire()
+    except asyncpg.exceptions.InterfaceError:
+        if not pool.is_closing():
+            raise
+    # The pool was evicted or closed between get_pool and acquire; the next one is new
+    pool = await get_pool(db_name, replica, transient)
+    return pool, await pool.acquire()
+
+async def acquire_connection(db_name: str, read_only: bool = False,
+                             transient: bool = False) -> Tuple[asyncpg.Pool, Any, Optional[Replica]]:
+    """Acquire a pooled connection, from a replica when read_only and one is usable.
+    A replica that cannot hand out a connection is ejected and the primary is used instead."""
+    replica = replica_router.choose() if read_only else None
+    if replica is not None:
+        try:
+            pool, conn = await _acquire_pooled(db_name, replica, transient)
+            _connection_replicas[id(conn)] = replica
+            return pool, conn, replica
+        except Exception as e:
+            replica_router.release(replica)
+            replica_router.eject(replica, e)
+            replica_router.primary_fallbacks += 1
+    pool, conn = await _acquire_pooled(db_name, None, transient)
+    return pool, conn, None
+
+async def release_connection(pool: asyncpg.Pool, conn, replica: Optional[Replica]):
+    """Give a connection from acquire_connection back to its pool"""
+    _connection_replicas.pop(id(conn), None)
+    replica_router.release(replica)
+    await pool.release(conn)
+
+
+# Per-tool instrumentation. Each tool call records its timings into a context-local dict
+# that get_db_connection fills in; the totals land in in-memory histograms exposed by
+# get_performance_metrics and, over HTTP transports, as Prometheus text on /metrics
+# Measuring payload size means JSON-encoding the result a second time, so by default it is
+# off; a rate of e.g. 0.05 measures one call in twenty
+METRICS_PAYLOAD_SAMPLE_RATE = float(os.getenv("METRICS_PAYLOAD_SAMPLE_RATE", "0"))
+METRICS_RECENT_SAMPLES = int(os.getenv("METRICS_RECENT_SAMPLES", "1024"))
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+ROWS_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000)
+
+# metric name -> (bucket bounds, description)
+TOOL_METRICS = {
+    "duration_seconds": (SECONDS_BUCKETS, "Total tool call time"),
+    "queue_wait_seconds": (SECONDS_BUCKETS, "Time spent waiting for an admission slot"),
+    "connect_seconds": (SECONDS_BUCKETS, "Time spent acquiring a pooled connection"),
+    "db_seconds": (SECONDS_BUCKETS, "Time a database connection was held"),
+    "serialize_seconds": (SECONDS_BUCKETS, "Time to JSON-encode the result (sampled calls only)"),
+    "payload_bytes": (BYTES_BUCKETS, "Size of the JSON-encoded result (sampled calls only)"),
+    "rows": (ROWS_BUCKETS, "Rows returned"),
+}
+
+class Histogram:
+    """Cumulative-bucket histogram plus a window of recent samples for percentiles"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=METRICS_RECENT_SAMPLES)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+
+        def percentile(fraction: float):
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 6) if ordered else None
+
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "avg": round(self.total / self.count, 6) if self.count else None,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": round(ordered[-1], 6) if ordered else None
+        }
+
+class MetricsStore:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.started_at = time.time()
+
+    def record(self, tool: str, sample: Dict[str, float], error: bool):
+        self.calls[tool] = self.calls.get(tool, 0) + 1
+        if error:
+            self.errors[tool] = self.errors.get(tool, 0) + 1
+        for name, value in sample.items():
+            histogram = self.histograms.get((tool, name))
+            if histogram is None:
+                histogram = self.histograms[(tool, name)] = Histogram(TOOL_METRICS[name][0])
+            histogram.observe(value)
+
+    def summary(self, tool: str = None) -> Dict[str, Any]:
+        tools = {}
+        for name in sorted(self.calls):
+            if tool and name != tool:
+                continue
+            tools[name] = {
+                "calls": self.calls[name],
+                "errors": self.errors.get(name, 0),
+                **{
+                    metric: histogram.summary()
+                    for (tool_name, metric), histogram in sorted(self.histograms.items())
+                    if tool_name == name
+                }
+            }
+        return {"since": datetime.datetime.fromtimestamp(self.started_at).isoformat(), "tools": tools}
+
+    def prometheus(self) -> str:
+        lines = [
+            "# HELP mcp_tool_calls_total Tool calls handled by the MCP server",
+            "# TYPE mcp_tool_calls_total counter"
+        ]
+        lines += [f'mcp_tool_calls_total{{tool="{tool}"}} {count}' for tool, count in sorted(self.calls.items())]
+        lines += [
+            "# HELP mcp_tool_errors_total Tool calls that returned an error",
+            "# TYPE mcp_tool_errors_total counter"
+        ]
+        lines += [f'mcp_tool_errors_total{{tool="{tool}"}} {self.errors.get(tool, 0)}' for tool in sorted(self.calls)]
+        for metric, (_, description) in TOOL_METRICS.items():
+            name = f"mcp_tool_{metric}"
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+            for (tool, tool_metric), histogram in sorted(self.histograms.items()):
+                if tool_metric != metric:
+                    continue
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    lines.append(f'{name}_bucket{{tool="{tool}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{tool="{tool}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{tool="{tool}"}} {histogram.total}')
+                lines.append(f'{name}_count{{tool="{tool}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsStore()
+_call_metrics: ContextVar[Optional[Dict[str, float]]] = ContextVar("call_metrics", default=None)
+
+def record_call_metric(name: str, value: float):
+    """Add to a timing of the tool call running in the current context, if any"""
+    sample = _call_metrics.get()
+    if sample is not None:
+        sample[name] = sample.get(name, 0.0) + value
+
+def _result_row_count(result: Any) -> Optional[int]:
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict) and isinstance(result.get("row_count"), int):
+        return result["row_count"]
+    return None
+
+def _result_is_error(result: Any) -> bool:
+    return isinstance(result, dict) and ("error" in result or result.get("status") == "error")
+
+def _finish_call(tool: str, sample: Dict[str, float], start: float, result: Any, error: bool):
+    sample["duration_seconds"] = time.perf_counter() - start
+    rows = _result_row_count(result)
+    if rows is not None:
+        sample["rows"] = rows
+    if result is not None and METRICS_PAYLOAD_SAMPLE_RATE > 0 and random.random() < METRICS_PAYLOAD_SAMPLE_RATE:
+        serialize_start = time.perf_counter()
+        sample["payload_bytes"] = len(json.dumps(result, default=str))
+        sample["serialize_seconds"] = time.perf_counter() - serialize_start
+    metrics.record(tool, sample, error or _result_is_error(result))
+
+def instrumented(fn):
+    """Record timings, row count and payload size of every call to an MCP tool"""
+    tool = fn.__name__
+
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            sample: Dict[str, float] = {}
+            token = _call_metrics.set(sample)
+            start = time.perf_counter()
+            result, error = None, True
+            try:
+                result = await fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                _call_metrics.reset(token)
+                _finish_call(tool, sample, start, result, error)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def sync_wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result, error = None, True
+        try:
+            result = fn(*args, **kwargs)
+            error = False
+            return result
+        finally:
+            _finish_call(tool, {}, start, result, error)
+    return sync_wrapper
+
+# Admission control - bounds concurrent database work globally and per database.
+# Cheap catalog tools get priority and a few reserved slots so they are never stuck
+# behind long-running queries
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "20"))
+ADMISSION_MAX_PER_DATABASE = int(os.getenv("ADMISSION_MAX_PER_DATABASE", str(DB_POOL_MAX_SIZE)))
+ADMISSION_RESERVED_SLOTS = int(os.getenv("ADMISSION_RESERVED_SLOTS", "2"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "30"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+
+PRIORITY_CATALOG = 0
+PRIORITY_QUERY = 1
+
+class AdmissionError(Exception):
+    """Raised when a tool call cannot get a database slot"""
+
+class AdmissionController:
+    """Priority-ordered counting semaphore with a global and a per-database limit"""
+
+    def __init__(self, max_concurrent: int, max_per_database: int, reserved_slots: int,
+                 max_wait: float, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_per_database = max_per_database
+        self.reserved_slots = max(0, min(reserved_slots, max_concurrent - 1))
+        # The reservation applies per database too, or one busy database would still
+        # leave its catalog calls waiting behind long queries
+        self.reserved_per_database = max(0, min(reserved_slots, max_per_database - 1))
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.active = 0
+        self.active_by_database: Dict[str, int] = {}
+        self.waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timeouts": 0,
+                      "max_queue_depth": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def _has_capacity(self, database: str, priority: int) -> bool:
+        if priority == PRIORITY_CATALOG:
+            limit, database_limit = self.max_concurrent, self.max_per_database
+        else:
+            limit = self.max_concurrent - self.reserved_slots
+            database_limit = self.max_per_database - self.reserved_per_database
+        return self.active < limit and self.active_by_database.get(database, 0) < database_limit
+
+    def _acquire(self, database: str):
+        self.active += 1
+        self.active_by_database[database] = self.active_by_database.get(database, 0) + 1
+
+    def _release(self, database: str):
+        self.active -= 1
+        remaining = self.active_by_database.get(database, 1) - 1
+        if remaining:
+            self.active_by_database[database] = remaining
+        else:
+            self.active_by_database.pop(database, None)
+        self._dispatch()
+
+    def _dispatch(self):
+        # Highest priority first, then arrival order; a waiter blocked on a busy
+        # database does not hold up waiters for other databases
+        for waiter in sorted(self.waiters):
+            priority, _, database, future = waiter
+            if self._has_capacity(database, priority):
+                self.waiters.remove(waiter)
+                self._acquire(database)
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, database: str, priority: int = PRIORITY_QUERY):
+        """Hold one slot for database while the block runs, queueing for up to max_wait seconds"""
+        queued_ahead = any(w[0] <= priority and w[2] == database for w in self.waiters)
+        if not queued_ahead and self._has_capacity(database, priority):
+            self._acquire(database)
+        else:
+            if len(self.waiters) >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise AdmissionError(f"Server busy: {len(self.waiters)} database calls already queued")
+            future = asyncio.get_running_loop().create_future()
+            waiter = (priority, next(self._sequence), database, future)
+            self.waiters.append(waiter)
+            self.stats["queued"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self.waiters))
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if future.done():
+                    # The slot was granted just as we gave up on it
+                    self._release(database)
+                else:
+                    future.cancel()
+                    self.waiters.remove(waiter)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self.stats["timeouts"] += 1
+                raise AdmissionError(f"Server busy: no database slot for {database} within {self.max_wait}s")
+            waited = time.monotonic() - start
+            self.stats["total_wait_seconds"] += waited
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+        self.stats["admitted"] += 1
+        try:
+            yield
+        finally:
+            self._release(database)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "active_by_database": dict(self.active_by_database),
+            "queue_depth": len(self.waiters),
+            "queued_catalog_calls": sum(1 for w in self.waiters if w[0] == PRIORITY_CATALOG),
+            **self.stats,
+            "total_wait_seconds": round(self.stats["total_wait_seconds"], 3),
+            "avg_wait_seconds": round(self.stats["total_wait_seconds"] / self.stats["queued"], 4)
+                if self.stats["queued"] else None,
+            "max_wait_seconds": round(self.stats["max_wait_seconds"], 3),
+            "limits": {
+                "max_concurrent": self.max_concurrent,
+                "max_per_database": self.max_per_database,
+                "reserved_catalog_slots": self.reserved_slots,
+                "reserved_catalog_slots_per_database": self.reserved_per_database,
+                "max_wait_seconds": self.max_wait,
+                "max_queue": self.max_queue
+            }
+        }
+
+admission = AdmissionController(
+    ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_PER_DATABASE, ADMISSION_RESERVED_SLOTS,
+    ADMISSION_MAX_WAIT, ADMISSION_MAX_QUEUE
+)
+
+def pool_max_size() -> int:
+    """Connections per pool: DB_POOL_MAX_SIZE, raised if needed so that with every admitted
+    call and open cursor of a database holding a connection, its reserved catalog slots still
+    find a free one"""
+    return max(DB_POOL_MAX_SIZE, admission.max_per_database + DB_MAX_OPEN_CURSORS)
+
+@asynccontextmanager
+async def get_db_connection(database_name: str = None, priority: int = PRIORITY_QUERY, read_only: bool = False,
+                            transient: bool = False):
+    """Acquire a pooled database connection, released back to the pool on exit.
+    Waits for an admission slot first; catalog lookups should pass priority=PRIORITY_CATALOG.
+    read_only=True lets the connection come from a read replica (see DB_REPLICAS); a pool
+    created with transient=True keeps no idle connections (see close_transient_pools)."""
+    db_name = database_name or current_database()
+    start = time.perf_counter()
+    async with admission.admit(db_name, priority):
+        admitted = time.perf_counter()
+        record_call_metric("queue_wait_seconds", admitted - start)
+        pool, conn, replica = await acquire_connection(db_name, read_only, transient)
+        acquired = time.perf_counter()
+        record_call_metric("connect_seconds", acquired - admitted)
+        try:
+            yield conn
+        except (OSError, asyncpg.exceptions.ConnectionDoesNotExistError) as e:
+            if replica is not None:
+                replica_router.eject(replica, e)
+            raise
+        finally:
+            record_call_metric("db_seconds", time.perf_counter() - acquired)
+            await release_connection(pool, conn, replica)
+
+async def close_all_pools():
+    """Close every open connection pool"""
+    await replica_router.close()
+    _transient_pools.clear()
+    while _pools:
+        key, pool = _pools.popitem()
+        _pool_last_used.pop(key, None)
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.warning(f"Error closing connection pool for {key[0]}: {e}")
+
+def get_pool_status() -> Dict[str, Any]:
+    """Summarize the size of every open connection pool"""
+    return {
+        f"{db_name}@{endpoint}" if endpoint else db_name: {
+            "size": pool.get_size(),
+            "idle": pool.get_idle_size(),
+            "min_size": pool.get_min_size(),
+            "max_size": pool.get_max_size(),
+        }
+        for (db_name, endpoint), pool in _pools.items()
+    }
+
+# Statement timeouts are enforced by Postgres (SET LOCAL statement_timeout inside a read-only
+# transaction), so a query that runs too long is stopped on the server, not just abandoned
+QUERY_TIMEOUT = float(os.getenv("QUERY_TIMEOUT", "60"))
+QUERY_TIMEOUT_MAX = float(os.getenv("QUERY_TIMEOUT_MAX", "300"))
+# Per-tool defaults, e.g. QUERY_TIMEOUTS="query_many_databases=15,execute_query=120"
+QUERY_TIMEOUTS = {
+    tool.strip(): float(seconds)
+    for tool, _, seconds in (item.partition("=") for item in os.getenv("QUERY_TIMEOUTS", "").split(","))
+    if seconds
+}
+
+def query_timeout(tool: str, requested: Optional[float] = None) -> float:
+    """Statement timeout in seconds for a tool call: what the caller asked for, else the
+    tool's configured default, else QUERY_TIMEOUT - never more than QUERY_TIMEOUT_MAX"""
+    timeout = requested if requested else QUERY_TIMEOUTS.get(tool, QUERY_TIMEOUT)
+    return max(0.1, min(timeout, QUERY_TIMEOUT_MAX))
+
+async def cancel_backend(database: str, pid: int, replica: Optional[Replica] = None):
+    """pg_cancel_backend over a short-lived side connection, so it never waits for a pool slot.
+    Backend pids are per server: pass the replica the backend runs on, None for the primary."""
+    host, port = (replica.host, replica.port) if replica is not None else (DB_HOST, DB_PORT)
+    try:
+        conn = await asyncpg.connect(
+            host=host, port=port, database=database, user=DB_USER, password=DB_PASSWORD, timeout=5.0
+        )
+        try:
+            await conn.execute("SELECT pg_cancel_backend($1)", pid)
+        finally:
+            await conn.close()
+    except Exception as e:
+        logger.warning(f"Could not cancel backend {pid} on {database}@{host}:{port}: {e}")
+
+@asynccontextmanager
+async def server_side_timeout(conn, database: str, timeout: float):
+    """Turn a statement_timeout abort into asyncio.TimeoutError, and cancel the backend
+    when the tool call is cancelled (e.g. by the MCP client) while a query is running.
+    The cancel happens before the connection goes back to the pool, so it can never hit
+    the next query on that connection."""
+    try:
+        yield
+    except asyncpg.exceptions.QueryCanceledError as e:
+        raise asyncio.TimeoutError(f"Query exceeded statement_timeout of {timeout:g}s") from e
+    except asyncio.CancelledError:
+        await cancel_backend(database, conn.get_server_pid(), _connection_replicas.get(id(conn)))
+        raise
+
+async def set_statement_timeout(conn, timeout: float):
+    """Limit every statement of the current transaction to `timeout` seconds"""
+    await conn.execute(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+
+@asynccontextmanager
+async def read_only_statement(conn, database: str, timeout: float):
+    """Read-only transaction whose statements Postgres aborts after `timeout` seconds"""
+    async with conn.transaction(readonly=True):
+        await set_statement_timeout(conn, timeout)
+        async with server_side_timeout(conn, database, timeout):
+            yield conn
+
+# Server-side cursors for paginated results - each open cursor holds one pooled
+# connection inside a read-only transaction until it is exhausted, closed or expires
+DB_CURSOR_TTL = float(os.getenv("DB_CURSOR_TTL", "300"))
+DB_MAX_OPEN_CURSORS = int(os.getenv("DB_MAX_OPEN_CURSORS", "5"))
+DB_MAX_PAGE_SIZE = int(os.getenv("DB_MAX_PAGE_SIZE", "1000"))
+
+class PagedCursor:
+    """A server-side cursor kept open across tool calls"""
+
+    def __init__(self, pool, conn, transaction, cursor, query: str, database: str, timeout: float,
+                 replica: Optional[Replica] = None):
+        self.pool = pool
+        self.conn = conn
+        self.replica = replica
+        self.transaction = transaction
+        self.cursor = cursor
+        self.query = query
+        self.database = database
+        self.timeout = timeout
+        self.rows_fetched = 0
+        self.pages_fetched = 0
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def fetch_page(self, page_size: int) -> List[asyncpg.Record]:
+        async with admission.admit(self.database):
+            async with server_side_timeout(self.conn, self.database, self.timeout):
+                # The client-side timeout is only a backstop for an unreachable server
+                rows = await self.cursor.fetch(page_size, timeout=self.timeout + 5)
+        self.rows_fetched += len(rows)
+        self.pages_fetched += 1
+        self.last_used = time.monotonic()
+        return rows
+
+    async def close(self):
+        try:
+            await self.transaction.rollback()
+        except Exception as e:
+            logger.warning(f"Error closing cursor on {self.database}: {e}")
+        finally:
+            # Releasing also resets the connection, so a failed rollback is cleaned up here
+            await release_connection(self.pool, self.conn, self.replica)
+
+_cursors: Dict[str, PagedCursor] = {}
+_cursor_reaper_task: Optional[asyncio.Task] = None
+
+async def _reap_expired_cursors():
+    """Close cursors that have not been read from within DB_CURSOR_TTL"""
+    now = time.monotonic()
+    for token, paged in list(_cursors.items()):
+        if paged.lock.locked() or now - paged.last_used < DB_CURSOR_TTL:
+            continue
+        _cursors.pop(token, None)
+        logger.info(f"Closing abandoned cursor on {paged.database} after {paged.rows_fetched} rows")
+        await paged.close()
+
+async def _cursor_reaper_loop():
+    while _cursors:
+        await asyncio.sleep(min(DB_CURSOR_TTL, 30.0))
+        await _reap_expired_cursors()
+
+def _ensure_cursor_reaper():
+    global _cursor_reaper_task
+    if _cursor_reaper_task is None or _cursor_reaper_task.done():
+        _cursor_reaper_task = asyncio.create_task(_cursor_reaper_loop())
+
+async def close_all_cursors():
+    """Close every open server-side cursor"""
+    while _cursors:
+        _, paged = _cursors.popitem()
+        await paged.close()
+
+def _page_result(paged: PagedCursor, rows: List[asyncpg.Record], page_size: int, token: Optional[str]) -> Dict[str, Any]:
+    has_more = len(rows) == page_size
+    return {
+        "rows": [dict(row) for row in rows],
+        "row_count": len(rows),
+        "page_number": paged.pages_fetched,
+        "rows_fetched": paged.rows_fetched,
+        "has_more": has_more,
+        "cursor_token": token if has_more else None,
+        "query": paged.query,
+        "database": paged.database
+    }
+
+async def open_paged_query(query: str, page_size: int, database_name: str = None,
+                           timeout: float = QUERY_TIMEOUT) -> Dict[str, Any]:
+    """Run a query through a server-side cursor and return its first page"""
+    await _reap_expired_cursors()
+    if len(_cursors) >= DB_MAX_OPEN_CURSORS:
+        raise RuntimeError(
+            f"Too many open cursors ({len(_cursors)}); close one with close_cursor or wait for it to expire"
+        )
+    page_size = max(1, min(page_size, DB_MAX_PAGE_SIZE))
+    db_name = database_name or current_database()
+    
+    async with admission.admit(db_name):
+        pool, conn, replica = await acquire_connection(db_name, read_only=True)
+        try:
+            transaction = conn.transaction(readonly=True)
+            await transaction.start()
+            await set_statement_timeout(conn, timeout)
+            _, warning = await query_guard.check(conn, db_name, query)
+            cursor = await conn.cursor(query)
+        except Exception:
+            await release_connection(pool, conn, replica)
+            raise
+    
+    paged = PagedCursor(pool, conn, transaction, cursor, query, db_name, timeout, replica)
+    try:
+        rows = await paged.fetch_page(page_size)
+    except BaseException:
+        await paged.close()
+        raise
+    
+    token = None
+    if len(rows) == page_size:
+        token = secrets.token_urlsafe(16)
+        _cursors[token] = paged
+        _ensure_cursor_reaper()
+    else:
+        await paged.close()
+    result = _page_result(paged, rows, page_size, token)
+    if warning:
+        result["cost_warning"] = warning
+    return result
+
+# Schema metadata cache - the user-visible catalog of each database is loaded in one
+# bulk query and served from memory until the TTL expires or the catalog fingerprint moves
+SCHEMA_CACHE_TTL = float(os.getenv("SCHEMA_CACHE_TTL", "300"))
+SCHEMA_CACHE_CHECK_INTERVAL = float(os.getenv("SCHEMA_CACHE_CHECK_INTERVAL", "5"))
+
+# Any DDL rewrites pg_class/pg_attribute/pg_constraint rows, which bumps their xmin or row count
+CATALOG_FINGERPRINT_QUERY = """
+SELECT
+    (SELECT count(*) FROM pg_class) as class_count,
+    (SELECT max(xmin::text::bigint) FROM pg_class) as class_xmin,
+    (SELECT max(xmin::text::bigint) FROM pg_attribute) as attribute_xmin,
+    (SELECT count(*) FROM pg_constraint) as constraint_count,
+    (SELECT max(xmin::text::bigint) FROM pg_constraint) as constraint_xmin
+"""
+
+CATALOG_QUERY = """
+SELECT
+    n.nspname as table_schema,
+    c.relname as table_name,
+    c.relkind::text as relkind,
+    pg_get_userbyid(c.relowner) as table_owner,
+    (
+        SELECT json_agg(json_build_object(
+            'column_name', a.attname,
+            'data_type', format_type(a.atttypid, NULL),
+            'is_nullable', CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END,
+            'column_default', pg_get_expr(d.adbin, d.adrelid),
+            'character_maximum_length',
+                CASE WHEN a.atttypid IN (1042, 1043) AND a.atttypmod > 0 THEN a.atttypmod - 4 END
+        ) ORDER BY a.attnum)
+        FROM pg_attribute a
+        LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+        WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    ) as columns,
+    (
+        SELECT json_agg(a.attname ORDER BY k.ord)
+        FROM pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey) WITH ORDINALITY as k(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+        WHERE con.conrelid = c.oid AND con.contype = 'p'
+    ) as primary_key,
+    (
+        SELECT json_agg(json_build_object(
+            'constraint_name', con.conname,
+            'table_name', c.relname,
+            'column_name', a.attname,
+            'foreign_schema_name', fn.nspname,
+            'foreign_table_name', fc.relname,
+            'foreign_column_name', fa.attname
+        ) ORDER BY con.conname, k.ord)
+        FROM pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY as k(attnum, fattnum, ord)
+        JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+        JOIN pg_class fc ON fc.oid = con.confrelid
+        JOIN pg_namespace fn ON fn.oid = fc.relnamespace
+        JOIN pg_attribute fa ON fa.attrelid = con.confrelid AND fa.attnum = k.fattnum
+        WHERE con.conrelid = c.oid AND con.contype = 'f'
+    ) as foreign_keys
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+AND n.nspname NOT IN ('information_schema', 'pg_catalog', 'pg_toast')
+AND n.nspname NOT LIKE 'pg_temp_%'
+AND (
+    pg_has_role(c.relowner, 'USAGE')
+    OR has_table_privilege(c.oid, 'SELECT, INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER')
+    OR has_any_column_privilege(c.oid, 'SELECT, INSERT, UPDATE, REFERENCES')
+)
+ORDER BY n.nspname, c.relname
+"""
+
+_schema_cache: Dict[str, Dict[str, Any]] = {}
+_schema_cache_locks: Dict[str, asyncio.Lock] = {}
+_schema_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+async def _load_schema_catalog(conn) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    rows = await conn.fetch_prepared(CATALOG_QUERY)
+    catalog = {}
+    for row in rows:
+        catalog[(row['table_schema'], row['table_name'])] = {
+            "schema": row['table_schema'],
+            "name": row['table_name'],
+            "relkind": row['relkind'],
+            "owner": row['table_owner'],
+            "columns": json.loads(row['columns']) if row['columns'] else [],
+            "primary_key": json.loads(row['primary_key']) if row['primary_key'] else [],
+            "foreign_keys": json.loads(row['foreign_keys']) if row['foreign_keys'] else []
+        }
+    return catalog
+
+async def get_schema_catalog(database_name: str = None) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Return the cached catalog of a database, keyed by (schema, table), reloading it when stale"""
+    db_name = database_name or current_database()
+    entry = _schema_cache.get(db_name)
+    now = time.monotonic()
+    if entry and now - entry["loaded_at"] < SCHEMA_CACHE_TTL:
+        if now - entry["checked_at"] < SCHEMA_CACHE_CHECK_INTERVAL:
+            _schema_cache_stats["hits"] += 1
+            return entry["tables"]
+        async with get_db_connection(db_name, priority=PRIORITY_CATALOG) as conn:
+            fingerprint = tuple(await conn.fetchrow_prepared(CATALOG_FINGERPRINT_QUERY))
+        if fingerprint == entry["fingerprint"]:
+            entry["checked_at"] = now
+            _schema_cache_stats["hits"] += 1
+            return entry["tables"]
+        _schema_cache_stats["invalidations"] += 1
+        logger.info(f"Catalog of database {db_name} changed, reloading schema cache")
+    
+    lock = _schema_cache_locks.setdefault(db_name, asyncio.Lock())
+    async with lock:
+        # Another caller may have reloaded the catalog while we waited for the lock
+        fresh = _schema_cache.get(db_name)
+        if fresh is not None and fresh is not entry:
+            _schema_cache_stats["hits"] += 1
+            return fresh["tables"]
+        _schema_cache_stats["misses"] += 1
+        async with get_db_connection(db_name, priority=PRIORITY_CATALOG) as conn:
+            fingerprint = tuple(await conn.fetchrow_prepared(CATALOG_FINGERPRINT_QUERY))
+            tables = await _load_schema_catalog(conn)
+        loaded_at = time.monotonic()
+        _schema_cache[db_name] = {
+            "tables": tables,
+            "fingerprint": fingerprint,
+            "loaded_at": loaded_at,
+            "checked_at": loaded_at
+        }
+        logger.info(f"Loaded schema cache for database {db_name}: {len(tables)} relations")
+        return tables
+
+def invalidate_schema_cache(database_name: str = None):
+    """Drop the cached catalog of one database, or of all databases"""
+    if database_name:
+        _schema_cache.pop(database_name, None)
+    else:
+        _schema_cache.clear()
+
+def get_schema_cache_status() -> Dict[str, Any]:
+    lookups = _schema_cache_stats["hits"] + _schema_cache_stats["misses"]
+    return {
+        **_schema_cache_stats,
+        "hit_ratio": round(_schema_cache_stats["hits"] / lookups, 4) if lookups else None,
+        "cached_databases": {
+            db_name: {
+                "relations": len(entry["tables"]),
+                "age_seconds": round(time.monotonic() - entry["loaded_at"], 1)
+            }
+            for db_name, entry in _schema_cache.items()
+        }
+    }
+
+def quote_ident(name: str) -> str:
+    """Quote a SQL identifier"""
+    return '"' + name.replace('"', '""') + '"'
+
+def qualified_name(schema_name: str, table_name: str) -> str:
+    return f"{quote_ident(schema_name)}.{quote_ident(table_name)}"
+
+STATS_MAX_PARALLEL = int(os.getenv("STATS_MAX_PARALLEL", "4"))
+
+async def gather_bounded(coroutines: List[Any], limit: int) -> List[Any]:
+    """asyncio.gather with at most limit coroutines running at once; results keep their order"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+    
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+    
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+# Opt-in result cache for read-only queries. Entries are keyed by (database, normalized
+# SQL, limit), bounded in bytes, expire after a TTL and are invalidated when the
+# pg_stat modification counters of the tables in the query plan move
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+
+TABLE_CHANGE_COUNTERS_QUERY = """
+SELECT relid::bigint, n_tup_ins, n_tup_upd, n_tup_del, n_live_tup
+FROM pg_stat_all_tables
+WHERE (schemaname, relname) IN (SELECT * FROM unnest($1::text[], $2::text[]))
+ORDER BY relid
+"""
+
+# Scanned left to right, so quotes inside comments and comment markers inside literals are
+# never mistaken for each other. Comments are dropped, everything else here is kept verbatim
+_SQL_OPAQUE = re.compile(
+    r"--[^\n]*"                                     # line comment
+    r"|/\*.*?\*/"                                   # block comment
+    r"|(?<![\w$])[Ee]'(?:[^'\\]|\\.|'')*'"          # E'...' with backslash escapes
+    r"|'(?:[^']|'')*'"                              # '...'
+    r'|"(?:[^"]|"")*"'                              # "quoted identifier"
+    r"|\$\$.*?\$\$"                                 # $$...$$
+    r"|\$(?P<tag>[^\W\d]\w*)\$.*?\$(?P=tag)\$",     # $tag$...$tag$
+    re.S
+)
+
+def normalize_sql(query: str) -> str:
+    """Canonical form of a query: comments dropped, whitespace collapsed and keywords
+    lowercased, leaving string literals (including dollar-quoted ones) and quoted
+    identifiers untouched"""
+    parts, code, pos = [], [], 0
+    for match in _SQL_OPAQUE.finditer(query):
+        code.append(query[pos:match.start()])
+        token = match.group(0)
+        if token.startswith(('--', '/*')):
+            code.append(' ')
+        else:
+            parts.append(re.sub(r'\s+', ' ', ''.join(code)).lower())
+            parts.append(token)
+            code = []
+        pos = match.end()
+    code.append(query[pos:])
+    parts.append(re.sub(r'\s+', ' ', ''.join(code)).lower())
+    return ''.join(parts).strip().rstrip(';').strip()
+
+def plan_relations(plan: Any) -> List[Tuple[str, str]]:
+    """(schema, table) of every relation scanned by an EXPLAIN (VERBOSE, FORMAT JSON) plan"""
+    relations = set()
+    nodes = plan if isinstance(plan, list) else [plan]
+    while nodes:
+        node = nodes.pop()
+        if not isinstance(node, dict):
+            continue
+        if "Plan" in node:
+            nodes.append(node["Plan"])
+        if "Relation Name" in node:
+            relations.add((node.get("Schema", "public"), node["Relation Name"]))
+        nodes.extend(node.get("Plans", []))
+    return sorted(relations)
+
+async def explain_plan(conn, query: str, verbose: bool = False) -> Any:
+    """Run EXPLAIN (FORMAT JSON) for a query and return the decoded plan"""
+    options = "VERBOSE, FORMAT JSON" if verbose else "FORMAT JSON"
+    plan = await conn.fetchval(f"EXPLAIN ({options}) {query}")
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+async def table_change_counters(conn, tables: List[Tuple[str, str]]) -> Tuple:
+    rows = await conn.fetch_prepared(
+        TABLE_CHANGE_COUNTERS_QUERY,
+        [schema for schema, _ in tables],
+        [table for _, table in tables]
+    )
+    return tuple(tuple(row) for row in rows)
+
+class QueryResultCache:
+    """LRU cache of query results bounded by their approximate JSON size"""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: "OrderedDict[Tuple[str, str, Optional[int]], Dict[str, Any]]" = OrderedDict()
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "bypasses": 0, "invalidations": 0, "evictions": 0,
+                      "saved_db_seconds": 0.0}
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.total_bytes -= entry["bytes"]
+
+    async def lookup(self, database: str, query: str, limit: Optional[int]) -> Optional[Dict[str, Any]]:
+        key = (database, normalize_sql(query), limit)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if time.monotonic() > entry["expires_at"]:
+            self._drop(key)
+            self.stats["misses"] += 1
+            return None
+        async with get_db_connection(database, priority=PRIORITY_CATALOG) as conn:
+            counters = await table_change_counters(conn, entry["tables"])
+        if counters != entry["counters"]:
+            self._drop(key)
+            self.stats["invalidations"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        self.stats["saved_db_seconds"] += entry["db_seconds"]
+        return entry
+
+    async def prepare(self, conn, query: str, plan: Any = None) -> Tuple[List[Tuple[str, str]], Tuple]:
+        """Find the tables a query reads and snapshot their change counters before it runs"""
+        if plan is None:
+            plan = await explain_plan(conn, query, verbose=True)
+        tables = plan_relations(plan)
+        counters = await table_change_counters(conn, tables) if tables else ()
+        return tables, counters
+
+    def store(self, database: str, query: str, limit: Optional[int], rows: List[Dict[str, Any]],
+              tables: List[Tuple[str, str]], counters: Tuple, db_seconds: float):
+        size = len(json.dumps(rows, default=str))
+        if size > self.max_bytes:
+            return
+        key = (database, normalize_sql(query), limit)
+        self._drop(key)
+        self.entries[key] = {
+            "rows": rows,
+            "bytes": size,
+            "tables": tables,
+            "counters": counters,
+            "db_seconds": db_seconds,
+            "expires_at": time.monotonic() + self.ttl
+        }
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            self._drop(next(iter(self.entries)))
+            self.stats["evictions"] += 1
+
+    def status(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "enabled": QUERY_CACHE_ENABLED,
+            **self.stats,
+            "saved_db_seconds": round(self.stats["saved_db_seconds"], 3),
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else None,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+query_cache = QueryResultCache(QUERY_CACHE_MAX_BYTES, QUERY_CACHE_TTL)
+
+# Cost guard - every ad-hoc query is EXPLAINed before it runs and refused (or, with
+# QUERY_GUARD_ACTION=warn, run with a warning) when the planner expects it to be too expensive
+QUERY_GUARD_ACTION = os.getenv("QUERY_GUARD_ACTION", "reject").lower()
+QUERY_GUARD_MAX_COST = float(os.getenv("QUERY_GUARD_MAX_COST", "1000000"))
+QUERY_GUARD_MAX_ROWS = float(os.getenv("QUERY_GUARD_MAX_ROWS", "10000000"))
+QUERY_GUARD_PLAN_CACHE_SIZE = int(os.getenv("QUERY_GUARD_PLAN_CACHE_SIZE", "512"))
+QUERY_GUARD_PLAN_TTL = float(os.getenv("QUERY_GUARD_PLAN_TTL", "300"))
+
+class QueryRejected(Exception):
+    """Raised when the cost guard refuses to run a query"""
+
+    def __init__(self, message: str, report: Dict[str, Any]):
+        super().__init__(message)
+        self.report = report
+
+def _offending_nodes(plan: Any, limit: int = 10) -> List[Dict[str, Any]]:
+    """Plan nodes whose own estimate exceeds a guard threshold, most expensive first"""
+    offending = []
+    nodes = [(plan[0] if isinstance(plan, list) else plan).get("Plan", {})]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        if node.get("Total Cost", 0) <= QUERY_GUARD_MAX_COST and node.get("Plan Rows", 0) <= QUERY_GUARD_MAX_ROWS:
+            continue
+        offending.append({
+            key: node[key]
+            for key in ("Node Type", "Join Type", "Relation Name", "Schema", "Alias", "Startup Cost",
+                        "Total Cost", "Plan Rows", "Plan Width", "Join Filter", "Filter", "Hash Cond",
+                        "Merge Cond", "Sort Key")
+            if key in node
+        })
+    offending.sort(key=lambda node: node["Total Cost"], reverse=True)
+    return offending[:limit]
+
+class QueryGuard:
+    """Checks EXPLAIN estimates against the cost and row thresholds, caching plans by normalized SQL"""
+
+    def __init__(self, action: str, max_cost: float, max_rows: float, cache_size: int, ttl: float):
+        self.action = action
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.plans: "OrderedDict[Tuple[str, str], Tuple[float, Any, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"checks": 0, "plan_cache_hits": 0, "rejected": 0, "warned": 0}
+
+    def _evaluate(self, plan: Any) -> Dict[str, Any]:
+        top = (plan[0] if isinstance(plan, list) else plan).get("Plan", {})
+        total_cost = top.get("Total Cost", 0)
+        plan_rows = top.get("Plan Rows", 0)
+        exceeded = []
+        if total_cost > self.max_cost:
+            exceeded.append(f"estimated cost {total_cost:,.0f} > {self.max_cost:,.0f}")
+        if plan_rows > self.max_rows:
+            exceeded.append(f"estimated rows {plan_rows:,.0f} > {self.max_rows:,.0f}")
+        report = {
+            "estimated_total_cost": total_cost,
+            "estimated_rows": plan_rows,
+            "max_cost": self.max_cost,
+            "max_rows": self.max_rows,
+            "exceeded": exceeded
+        }
+        if exceeded:
+            report["offending_nodes"] = _offending_nodes(plan)
+        return report
+
+    async def plan(self, conn, database: str, query: str) -> Tuple[Any, Dict[str, Any]]:
+        """EXPLAIN (VERBOSE) plan of a query and its guard report, from cache when fresh"""
+        key = (database, normalize_sql(query))
+        cached = self.plans.get(key)
+        if cached and time.monotonic() < cached[0]:
+            self.plans.move_to_end(key)
+            self.stats["plan_cache_hits"] += 1
+            return cached[1], cached[2]
+        plan = await explain_plan(conn, query, verbose=True)
+        report = self._evaluate(plan)
+        self.plans[key] = (time.monotonic() + self.ttl, plan, report)
+        self.plans.move_to_end(key)
+        while len(self.plans) > self.cache_size:
+            self.plans.popitem(last=False)
+        return plan, report
+
+    async def check(self, conn, database: str, query: str) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Return (plan, warning report or None); raise QueryRejected when the query is too expensive"""
+        if self.action == "off":
+            return None, None
+        self.stats["checks"] += 1
+        plan, report = await self.plan(conn, database, query)
+        if not report["exceeded"]:
+            return plan, None
+        if self.action == "warn":
+            self.stats["warned"] += 1
+            logger.warning(f"Running expensive query ({'; '.join(report['exceeded'])}): {query}")
+            return plan, report
+        self.stats["rejected"] += 1
+        raise QueryRejected(
+            f"Query rejected by cost guard: {'; '.join(report['exceeded'])}. "
+            "Add selective filters or join conditions, or aggregate before returning rows.",
+            report
+        )
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "action": self.action,
+            "max_cost": self.max_cost,
+            "max_rows": self.max_rows,
+            **self.stats,
+            "cached_plans": len(self.plans)
+        }
+
+query_guard = QueryGuard(QUERY_GUARD_ACTION, QUERY_GUARD_MAX_COST, QUERY_GUARD_MAX_ROWS,
+                         QUERY_GUARD_PLAN_CACHE_SIZE, QUERY_GUARD_PLAN_TTL)
+
+async def _primary_cache_snapshot(db_name: str, query: str) -> Tuple[List[Tuple[str, str]], Tuple]:
+    """query_cache.prepare on the primary, for queries that then run on a replica.
+    The plan goes through the cost guard's cache, so the replica's guard check reuses it."""
+    try:
+        async with get_db_connection(db_name, priority=PRIORITY_CATALOG) as conn:
+            async with conn.transaction(readonly=True):
+                plan = (await query_guard.plan(conn, db_name, query))[0] if query_guard.action != "off" else None
+                return await query_cache.prepare(conn, query, plan)
+    except Exception as e:
+        logger.debug(f"Not caching query, EXPLAIN failed: {e}")
+        return [], ()
+
+async def fetch_rows(query: str, database_name: str = None, limit: Optional[int] = None,
+                     use_cache: bool = True, timeout: float = QUERY_TIMEOUT) -> Tuple[List[Dict[str, Any]], bool, Optional[Dict[str, Any]]]:
+    """Run a read-only query and return (rows as dicts, served from cache, cost guard warning).
+    Raises QueryRejected when the cost guard refuses the query.
+    Only queries that scan at least one table are cached, so SELECT now() and friends never are."""
+    db_name = database_name or current_database()
+    cacheable = QUERY_CACHE_ENABLED and use_cache
+    if QUERY_CACHE_ENABLED and not use_cache:
+        query_cache.stats["bypasses"] += 1
+    if cacheable:
+        entry = await query_cache.lookup(db_name, query, limit)
+        if entry is not None:
+            return entry["rows"], True, None
+    
+    tables, counters = [], ()
+    if cacheable and replica_router.enabled:
+        # Change counters only move on the primary. Read them before taking the read-only
+        # slot: waiting for a second slot while holding one can stall on a saturated database
+        tables, counters = await _primary_cache_snapshot(db_name, query)
+    
+    async with get_db_connection(db_name, read_only=True) as conn, read_only_statement(conn, db_name, timeout):
+        plan, warning = await query_guard.check(conn, db_name, query)
+        if cacheable and not replica_router.enabled:
+            try:
+                # Savepoint, so a failed lookup does not abort the query's transaction
+                async with conn.transaction():
+                    tables, counters = await query_cache.prepare(conn, query, plan)
+            except Exception as e:
+                logger.debug(f"Not caching query, EXPLAIN failed: {e}")
+        start = time.perf_counter()
+        # The client-side timeout is only a backstop for an unreachable server
+        rows = await conn.fetch(query, timeout=timeout + 5)
+        db_seconds = time.perf_counter() - start
+    
+    # Convert rows to list of dictionaries
+    result_data = [dict(row) for row in rows]
+    if tables:
+        query_cache.store(db_name, query, limit, result_data, tables, counters, db_seconds)
+    return result_data, False, warning
+
+# Result encodings. "rows" (the default) is a list of dicts, which repeats every column
+# name in every row; the alternatives send the column names once
+RESULT_FORMATS = ("rows", "columns", "columns_gzip", "arrow")
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    return str(value)
+
+def _column_arrays(rows: List[Dict[str, Any]]) -> Tuple[List[str], List[List[Any]]]:
+    columns = list(rows[0].keys()) if rows else []
+    return columns, [[row[column] for row in rows] for column in columns]
+
+def _arrow_payload(columns: List[str], column_data: List[List[Any]]) -> str:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError("result_format='arrow' requires pyarrow (uv pip install pyarrow)")
+    table = pa.table(dict(zip(columns, column_data)))
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+
+def encode_rows(rows: List[Dict[str, Any]], result_format: str = "rows") -> Dict[str, Any]:
+    """Encode query rows in one of RESULT_FORMATS:
+    - rows: [{"col": value, ...}, ...]
+    - columns: column names once plus one value array per column
+    - columns_gzip: the column arrays as gzip-compressed JSON, base64 encoded
+    - arrow: an Arrow IPC stream (zstd-compressed), base64 encoded; needs pyarrow"""
+    if result_format == "rows":
+        return {"rows": rows}
+    columns, column_data = _column_arrays(rows)
+    if result_format == "columns":
+        return {"format": "columns", "columns": columns, "column_data": column_data}
+    if result_format == "columns_gzip":
+        payload = gzip.compress(json.dumps(column_data, default=_json_default).encode("utf-8"))
+        return {
+            "format": "columns_gzip",
+            "columns": columns,
+            "encoding": "base64(gzip(json column arrays))",
+            "payload": base64.b64encode(payload).decode("ascii")
+        }
+    if result_format == "arrow":
+        return {
+            "format": "arrow",
+            "columns": columns,
+            "encoding": "base64(arrow ipc stream)",
+            "payload": _arrow_payload(columns, column_data)
+        }
+    raise ValueError(f"result_format must be one of {', '.join(RESULT_FORMATS)}")
+
+def format_result(result: Dict[str, Any], result_format: str) -> Dict[str, Any]:
+    """Re-encode the "rows" of a tool result in the requested result_format"""
+    if result_format == "rows" or "rows" not in result:
+        return result
+    encoded = encode_rows(result["rows"], result_format)
+    return {**encoded, **{key: value for key, value in result.items() if key != "rows"}}
+
 # Test database connection on startup
 async def test_db_connection():
     """Test database connection during startup"""
     try:
         logger.info(f"Testing connection to {DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
-        conn = await get_db_connection()
-        
-        # Test with a simple query
-        result = await conn.fetchval("SELECT 1")
-        await conn.close()
+        async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+            # Test with a simple query
+            result = await conn.fetchval("SELECT 1")
         
         logger.info(f"Database connection successful: {DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
         return True
@@ -66,40 +1532,47 @@ async def test_db_connection():
         return False
 
 @mcp.tool
-async def list_tables(random_string: str = "dummy") -> Dict[str, Any]:
-    """List all tables in the database from all schemas"""
-    conn = None
+@instrumented
+async def list_tables(random_string: str = "dummy", include_stats: bool = False) -> Dict[str, Any]:
+    """List all tables in the database from all schemas.
+    With include_stats, each table also gets its estimated row count and sizes (from catalog statistics)."""
     try:
-        conn = await get_db_connection()
-        
-        query = """
-        SELECT 
-            table_schema,
-            table_name,
-            table_schema || '.' || table_name as full_name
-        FROM information_schema.tables 
-        WHERE table_type = 'BASE TABLE'
-        AND table_schema NOT IN ('information_schema', 'pg_catalog', 'pg_toast')
-        ORDER BY table_schema, table_name
-        """
-        
-        rows = await conn.fetch(query)
+        table_stats = {}
+        if include_stats:
+            async def fetch_stats() -> List[asyncpg.Record]:
+                async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+                    return await conn.fetch_prepared(ALL_TABLES_INFO_QUERY)
+            
+            # The catalog and the statistics are independent, so load them concurrently
+            catalog, rows = await asyncio.gather(get_schema_catalog(), fetch_stats())
+            table_stats = {(row['schema_name'], row['table_name']): row for row in rows}
+        else:
+            catalog = await get_schema_catalog()
         
         tables = []
         schemas = {}
-        for row in rows:
+        for table in catalog.values():
+            if table["relkind"] not in ('r', 'p'):
+                continue
             table_info = {
-                "schema": row['table_schema'],
-                "name": row['table_name'],
-                "full_name": row['full_name']
+                "schema": table["schema"],
+                "name": table["name"],
+                "full_name": f"{table['schema']}.{table['name']}"
             }
+            stats = table_stats.get((table["schema"], table["name"]))
+            if stats:
+                table_info.update({
+                    "estimated_row_count": stats['estimated_row_count'],
+                    "total_size": stats['total_size'],
+                    "total_bytes": stats['total_bytes']
+                })
             tables.append(table_info)
             
             # Group by schema
-            schema = row['table_schema']
+            schema = table["schema"]
             if schema not in schemas:
                 schemas[schema] = []
-            schemas[schema].append(row['table_name'])
+            schemas[schema].append(table["name"])
         
         return {
             "tables": tables,
@@ -119,49 +1592,25 @@ async def list_tables(random_string: str = "dummy") -> Dict[str, Any]:
             "status": "error",
             "error": str(e)
         }
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
+@instrumented
 async def describe_table(table_name: str, schema_name: str = None) -> Dict[str, Any]:
     """Get the schema information for a specific table. If schema_name is not provided, searches all schemas."""
-    conn = None
     try:
-        conn = await get_db_connection()
+        catalog = await get_schema_catalog()
         
         if schema_name:
-            query = """
-            SELECT 
-                column_name,
-                data_type,
-                is_nullable,
-                column_default,
-                character_maximum_length,
-                table_schema
-            FROM information_schema.columns 
-            WHERE table_name = $1 AND table_schema = $2
-            ORDER BY ordinal_position
-            """
-            rows = await conn.fetch(query, table_name, schema_name)
+            matches = [catalog[(schema_name, table_name)]] if (schema_name, table_name) in catalog else []
         else:
-            query = """
-            SELECT 
-                column_name,
-                data_type,
-                is_nullable,
-                column_default,
-                character_maximum_length,
-                table_schema
-            FROM information_schema.columns 
-            WHERE table_name = $1 
-            AND table_schema NOT IN ('information_schema', 'pg_catalog', 'pg_toast')
-            ORDER BY table_schema, ordinal_position
-            """
-            rows = await conn.fetch(query, table_name)
-        
-        columns = [dict(row) for row in rows]
-        schemas_found = list(set(row['table_schema'] for row in rows)) if rows else []
+            matches = [table for table in catalog.values() if table["name"] == table_name]
+        
+        columns = [
+            {**column, "table_schema": table["schema"]}
+            for table in matches
+            for column in table["columns"]
+        ]
+        schemas_found = [table["schema"] for table in matches]
         
         return {
             "table_name": table_name,
@@ -183,39 +1632,54 @@ async def describe_table(table_name: str, schema_name: str = None) -> Dict[str,
             "status": "error",
             "error": str(e)
         }
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
-async def execute_query(query: str, limit: int = 100) -> Dict[str, Any]:
-    """Execute a SQL query on the database (SELECT statements only for safety)"""
+@instrumented
+async def execute_query(query: str, limit: int = 100, page_size: Optional[int] = None,
+                        use_cache: bool = True, result_format: str = "rows",
+                        timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Execute a SQL query on the database (SELECT statements only for safety).
+    Pass page_size to page through large results with a server-side cursor: the first
+    page is returned with a cursor_token to pass to fetch_next_page (no LIMIT is added).
+    When the server's result cache is enabled, set use_cache=False to force a fresh read.
+    result_format: "rows" (list of dicts), "columns" (column names once plus value arrays),
+    "columns_gzip" or "arrow" (compressed base64 payloads for large, numeric-heavy results).
+    timeout_seconds: statement timeout enforced by Postgres (capped by the server's maximum)."""
     # Basic safety check - only allow SELECT statements
     query_stripped = query.strip().upper()
     if not query_stripped.startswith('SELECT'):
         return {"error": "Only SELECT statements are allowed for safety"}
+    if result_format not in RESULT_FORMATS:
+        return {"error": f"result_format must be one of {', '.join(RESULT_FORMATS)}"}
     
-    conn = None
     try:
-        conn = await get_db_connection()
+        if page_size:
+            result = await open_paged_query(query.rstrip().rstrip(';'), page_size,
+                                            timeout=query_timeout("execute_query", timeout_seconds))
+            logger.info(f"Paged query opened: {result['row_count']} rows in first page")
+            return format_result(result, result_format)
         
         # Add LIMIT clause if not present
         if 'LIMIT' not in query_stripped:
             query = f"{query.rstrip(';')} LIMIT {limit}"
         
-        # Add timeout for query execution
-        rows = await asyncio.wait_for(conn.fetch(query), timeout=60.0)
-        
-        # Convert rows to list of dictionaries
-        result_data = [dict(row) for row in rows]
+        result_data, cached, warning = await fetch_rows(
+            query, limit=limit, use_cache=use_cache, timeout=query_timeout("execute_query", timeout_seconds)
+        )
         
         result = {
             "rows": result_data,
             "row_count": len(result_data),
-            "query": query
+            "query": query,
+            "cached": cached
         }
+        if warning:
+            result["cost_warning"] = warning
         logger.info(f"Query executed successfully: {len(result_data)} rows returned")
-        return result
+        return format_result(result, result_format)
+    except QueryRejected as e:
+        logger.warning(f"{e}: {query}")
+        return {"error": str(e), "query": query, "cost_guard": e.report}
     except asyncio.TimeoutError:
         error_msg = "Query execution timed out"
         logger.error(f"Query execution timed out: {query}")
@@ -224,67 +1688,342 @@ async def execute_query(query: str, limit: int = 100) -> Dict[str, Any]:
         error_msg = str(e)
         logger.error(f"Query execution failed: {error_msg}")
         return {"error": error_msg, "query": query}
-    finally:
-        if conn:
-            try:
-                await conn.close()
-            except Exception:
-                pass  # Ignore close errors
 
 @mcp.tool
-async def get_table_sample(table_name: str, limit: int = 5) -> Dict[str, Any]:
-    """Get a sample of rows from a specific table"""
-    conn = None
+@instrumented
+async def fetch_next_page(cursor_token: str, page_size: int = 100, result_format: str = "rows") -> Dict[str, Any]:
+    """Fetch the next page of a paged execute_query/query_database result"""
+    if result_format not in RESULT_FORMATS:
+        return {"error": f"result_format must be one of {', '.join(RESULT_FORMATS)}"}
+    paged = _cursors.get(cursor_token)
+    if paged is None:
+        return {"error": "Unknown or expired cursor_token", "cursor_token": cursor_token}
+    
+    page_size = max(1, min(page_size, DB_MAX_PAGE_SIZE))
+    async with paged.lock:
+        if _cursors.get(cursor_token) is not paged:
+            return {"error": "Unknown or expired cursor_token", "cursor_token": cursor_token}
+        try:
+            rows = await paged.fetch_page(page_size)
+        except asyncio.TimeoutError:
+            _cursors.pop(cursor_token, None)
+            await paged.close()
+            logger.error(f"Fetching next page timed out: {paged.query}")
+            return {"error": "Query execution timed out", "query": paged.query, "database": paged.database}
+        except asyncio.CancelledError:
+            _cursors.pop(cursor_token, None)
+            await paged.close()
+            raise
+        except Exception as e:
+            _cursors.pop(cursor_token, None)
+            await paged.close()
+            logger.error(f"Fetching next page failed: {e}")
+            return {"error": str(e), "query": paged.query, "database": paged.database}
+        
+        result = _page_result(paged, rows, page_size, cursor_token)
+        if not result["has_more"]:
+            _cursors.pop(cursor_token, None)
+            await paged.close()
+    logger.info(f"Fetched page {result['page_number']} with {result['row_count']} rows")
+    return format_result(result, result_format)
+
+@mcp.tool
+@instrumented
+async def close_cursor(cursor_token: str) -> Dict[str, Any]:
+    """Close a paged query before it is exhausted, releasing its connection"""
+    paged = _cursors.pop(cursor_token, None)
+    if paged is None:
+        return {"status": "error", "message": "Unknown or expired cursor_token", "cursor_token": cursor_token}
+    async with paged.lock:
+        await paged.close()
+    return {"status": "success", "cursor_token": cursor_token, "rows_fetched": paged.rows_fetched}
+
+SAMPLE_MAX_VALUE_LENGTH = int(os.getenv("SAMPLE_MAX_VALUE_LENGTH", "200"))
+SAMPLE_METHODS = ("system", "bernoulli", "first")
+# Column types whose values can be arbitrarily large; they are cut down on the server
+WIDE_TYPES = ('text', 'character varying', 'character', 'citext', 'json', 'jsonb', 'xml', 'bytea')
+
+# reltuples is -1 (or 0) until the table is first analyzed; its page count is then a lower
+# bound on its rows, as every non-empty heap page holds at least one
+TABLE_ROW_ESTIMATE_QUERY = """
+    SELECT CASE WHEN reltuples > 0 THEN reltuples::bigint
+                ELSE pg_relation_size(oid) / current_setting('block_size')::bigint END
+    FROM pg_class WHERE oid = $1::text::regclass
+"""
+# Resolves a table name the way the query itself would, through search_path
+RESOLVE_TABLE_QUERY = """
+    SELECT n.nspname, c.relname
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = to_regclass($1)
+"""
+
+def _sample_select(columns: List[Dict[str, Any]], max_value_length: int) -> Tuple[str, List[Tuple[int, Optional[int]]]]:
+    """Select list that returns at most max_value_length characters of every wide column,
+    plus its full length so truncated values can be flagged. Also returns, per column, the
+    positions of its value and length (None if not wide) in the row: rows are read by
+    position, so no generated alias can collide with a real column name."""
+    parts = []
+    positions = []
+    for column in columns:
+        name = quote_ident(column['column_name'])
+        if column['data_type'] in WIDE_TYPES or column['data_type'].endswith('[]'):
+            positions.append((len(parts), len(parts) + 1))
+            parts.append(f"left({name}::text, {max_value_length}) as {name}")
+            parts.append(f"length({name}::text)")
+        else:
+            positions.append((len(parts), None))
+            parts.append(name)
+    return ", ".join(parts), positions
+
+@mcp.tool
+@instrumented
+async def get_table_sample(table_name: str, limit: int = 5, columns: Optional[List[str]] = None,
+                           sample_method: str = "system", seed: Optional[int] = None,
+                           max_value_length: int = SAMPLE_MAX_VALUE_LENGTH) -> Dict[str, Any]:
+    """Get a small, representative sample of rows from a table ('table' or 'schema.table'; an
+    unqualified name is looked up through the search_path). sample_method "system" picks random pages (cheap), "bernoulli" random rows (reads the whole
+    table), "first" the physically-first rows. Pass the returned seed again to get the same sample.
+    columns limits the preview to those columns; text/json/bytea/array values longer than
+    max_value_length are truncated and listed with their full length under "truncated"."""
+    if sample_method not in SAMPLE_METHODS:
+        return {"error": f"sample_method must be one of {', '.join(SAMPLE_METHODS)}", "table_name": table_name}
+    limit = max(1, min(limit, DB_MAX_PAGE_SIZE))
+    max_value_length = max(1, max_value_length)
+    seed = seed if seed is not None else random.randint(0, 2**31 - 1)
+    query = None
     try:
-        conn = await get_db_connection()
-        query = f"SELECT * FROM {table_name} LIMIT {limit}"
-        rows = await conn.fetch(query)
+        try:
+            async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+                resolved = await conn.fetchrow_prepared(RESOLVE_TABLE_QUERY, table_name)
+        except asyncpg.PostgresError:
+            # Not valid identifier syntax (e.g. a name with spaces passed without quotes)
+            resolved = None
+        # Fall back to the literal name so such names and unquoted mixed-case names still match
+        schema_name, name = tuple(resolved) if resolved else _split_table_name(table_name, 'public')
+        catalog = await get_schema_catalog()
+        table = catalog.get((schema_name, name))
+        if table is None:
+            return {"error": f"Table {schema_name}.{name} not found", "table_name": table_name}
+        selected = table["columns"]
+        if columns:
+            by_name = {column['column_name']: column for column in table["columns"]}
+            unknown = [column for column in columns if column not in by_name]
+            if unknown:
+                return {"error": f"Unknown columns: {', '.join(unknown)}", "table_name": table_name,
+                        "available_columns": list(by_name)}
+            selected = [by_name[column] for column in columns]
+        if table["relkind"] in ('v', 'f'):
+            # Views and foreign tables cannot be sampled
+            sample_method = "first"
         
-        result_data = [dict(row) for row in rows]
+        from_clause = qualified_name(schema_name, name)
+        sample_percent = None
+        db_name = current_database()
+        async with get_db_connection(db_name, read_only=True) as conn, \
+                read_only_statement(conn, db_name, query_timeout("get_table_sample")):
+            if sample_method != "first":
+                estimated_rows = await conn.fetchval_prepared(TABLE_ROW_ESTIMATE_QUERY, from_clause)
+                # Oversample so a few empty or sparse pages still leave enough rows
+                sample_percent = 100.0
+                if estimated_rows and estimated_rows > 0:
+                    sample_percent = round(min(100.0, max(limit * 10 * 100.0 / estimated_rows, 0.0001)), 4)
+                from_clause += f" TABLESAMPLE {sample_method.upper()} ({sample_percent}) REPEATABLE ({seed})"
+            order_clause = ""
+            if sample_percent is not None and estimated_rows:
+                # Shuffle the (small) sample deterministically so a 100% sample is not just the first
+                # rows; skipped when the size is unknown (e.g. a partitioned parent never analyzed),
+                # as the sort could then cover the whole table before the LIMIT
+                order_clause = f" ORDER BY md5(ctid::text || '{seed}')"
+            select_list, positions = _sample_select(selected, max_value_length)
+            query = f"SELECT {select_list} FROM {from_clause}{order_clause} LIMIT {limit}"
+            rows = await conn.fetch(query)
         
-        return {
+        result_data = []
+        truncated = []
+        for row_number, row in enumerate(rows):
+            values = {}
+            for column, (value_position, length_position) in zip(selected, positions):
+                values[column['column_name']] = row[value_position]
+                length = row[length_position] if length_position is not None else None
+                if length is not None and length > max_value_length:
+                    truncated.append({"row": row_number, "column": column['column_name'], "length": length})
+            result_data.append(values)
+        
+        result = {
             "rows": result_data,
             "row_count": len(result_data),
             "query": query,
-            "table_name": table_name
+            "table_name": table_name,
+            "sample_method": sample_method,
+            "seed": seed if sample_method != "first" else None,
+            "truncated": truncated
         }
+        if sample_percent is not None:
+            result["sample_percent"] = sample_percent
+        return result
     except Exception as e:
         logger.error(f"Error getting sample from table {table_name}: {str(e)}")
-        return {"error": str(e), "table_name": table_name, "query": f"SELECT * FROM {table_name} LIMIT {limit}"}
-    finally:
-        if conn:
-            await conn.close()
+        return {"error": str(e), "table_name": table_name, "query": query}
+
+SEARCH_INDEX_HINT_THRESHOLD = int(os.getenv("SEARCH_INDEX_HINT_THRESHOLD", "5"))
+ALLOW_INDEX_CREATION = os.getenv("ALLOW_INDEX_CREATION", "false").lower() in ("1", "true", "yes")
+SEARCH_INDEX_BUILD_TIMEOUT = float(os.getenv("SEARCH_INDEX_BUILD_TIMEOUT", "3600"))
+
+TEXT_TYPES = ('text', 'character varying', 'character', 'citext')
+
+SEARCH_COLUMN_QUERY = """
+SELECT
+    (
+        SELECT format_type(a.atttypid, NULL)
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass($1) AND a.attname = $2 AND NOT a.attisdropped
+    ) as data_type,
+    ARRAY(
+        SELECT pg_get_indexdef(x.indexrelid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_am am ON am.oid = i.relam
+        WHERE x.indrelid = to_regclass($1) AND x.indisvalid AND am.amname IN ('gin', 'gist')
+    ) as search_indexes
+"""
+
+# Number of sequential-scan searches per (database, table, column), used to suggest indexes
+_search_scan_counts: Dict[Tuple[str, str, str], int] = {}
+
+def _column_pattern(column_name: str) -> str:
+    # pg_get_indexdef only quotes identifiers that need it
+    return f'(?:{re.escape(column_name)}|{re.escape(quote_ident(column_name))})'
+
+def find_search_index(index_definitions: List[str], column_name: str) -> Optional[Dict[str, str]]:
+    """Pick a trigram index on the column, else a full-text index on to_tsvector(column)"""
+    column = _column_pattern(column_name)
+    for definition in index_definitions:
+        if re.search(rf'[(,]\s*{column}\s+g(?:in|ist)_trgm_ops', definition):
+            return {"mode": "trigram", "index_definition": definition}
+    for definition in index_definitions:
+        match = re.search(rf"to_tsvector\('([^']+)'::regconfig,\s*(?:\({column}\)::text|{column})\)", definition)
+        if match:
+            # Reuse the indexed expression verbatim so the planner can match the index
+            return {"mode": "fulltext", "index_definition": definition,
+                    "expression": match.group(0), "config": match.group(1)}
+    return None
 
 @mcp.tool
-async def search_table(table_name: str, column_name: str, search_term: str, limit: int = 50) -> Dict[str, Any]:
-    """Search for records in a table where a column contains the search term"""
-    conn = None
+@instrumented
+async def search_table(table_name: str, column_name: str, search_term: str, limit: int = 50,
+                       mode: str = "auto", extra_columns: Optional[List[str]] = None,
+                       text_search_config: str = "simple") -> Dict[str, Any]:
+    """Search for records in a table where a column contains the search term.
+    mode="auto" uses an existing index on the column when there is one: a pg_trgm GIN/GiST
+    index serves the substring match directly, a to_tsvector GIN index turns it into a ranked
+    full-text (word) match. Without an index it falls back to a sequential ILIKE scan.
+    Other modes force "ilike", "trigram" (substring match on the raw column) or "fulltext".
+    Passing extra_columns runs one ranked full-text search across all the columns."""
+    if mode not in ("auto", "ilike", "trigram", "fulltext"):
+        return {"error": "mode must be one of 'auto', 'ilike', 'trigram' or 'fulltext'",
+                "table": table_name, "column": column_name, "search_term": search_term}
+    if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_.]*', text_search_config):
+        return {"error": "text_search_config must be a text search configuration name such as 'english'",
+                "table": table_name, "column": column_name, "search_term": search_term}
+    columns = [column_name] + list(extra_columns or [])
     try:
-        conn = await get_db_connection()
-        query = f"SELECT * FROM {table_name} WHERE {column_name}::text ILIKE $1 LIMIT {limit}"
-        rows = await conn.fetch(query, f"%{search_term}%")
+        index = None
+        if len(columns) > 1:
+            search_mode = "fulltext"
+        else:
+            async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+                column_info = await conn.fetchrow_prepared(SEARCH_COLUMN_QUERY, table_name, column_name)
+            if mode in ("auto", "fulltext"):
+                index = find_search_index(list(column_info['search_indexes'] or []), column_name)
+                if mode == "fulltext" and index and index["mode"] != "fulltext":
+                    index = None
+            search_mode = index["mode"] if index else ("ilike" if mode == "auto" else mode)
+            if search_mode == "trigram" and column_info['data_type'] not in TEXT_TYPES:
+                # A trigram index can only be on a text column; match the cast value instead
+                search_mode = "ilike"
+        
+        if search_mode == "fulltext":
+            if index:
+                document = index["expression"]
+                config = index["config"]
+            else:
+                config = text_search_config
+                parts = " || ' ' || ".join(f"coalesce({quote_ident(c)}::text, '')" for c in columns)
+                document = f"to_tsvector('{config}'::regconfig, {parts})"
+            query = (
+                f"SELECT search_target.*, ts_rank({document}, search_query) as search_rank "
+                f"FROM {table_name} as search_target, websearch_to_tsquery('{config}'::regconfig, $1) as search_query "
+                f"WHERE {document} @@ search_query ORDER BY search_rank DESC LIMIT {limit}"
+            )
+            parameter = search_term
+        elif search_mode == "trigram":
+            query = f"SELECT * FROM {table_name} WHERE {quote_ident(column_name)} ILIKE $1 LIMIT {limit}"
+            parameter = f"%{search_term}%"
+        else:
+            query = f"SELECT * FROM {table_name} WHERE {column_name}::text ILIKE $1 LIMIT {limit}"
+            parameter = f"%{search_term}%"
+        
+        db_name = current_database()
+        async with get_db_connection(db_name, read_only=True) as conn, \
+                read_only_statement(conn, db_name, query_timeout("search_table")):
+            rows = await conn.fetch_prepared(query, parameter)
         
         result_data = [dict(row) for row in rows]
         
-        return {
+        result = {
             "rows": result_data,
             "row_count": len(result_data),
             "query": query,
-            "search_term": search_term
+            "search_term": search_term,
+            "search_mode": search_mode,
+            "index_used": index["index_definition"] if index else None
         }
+        if search_mode == "ilike":
+            key = (current_database(), table_name, column_name)
+            _search_scan_counts[key] = _search_scan_counts.get(key, 0) + 1
+            if _search_scan_counts[key] >= SEARCH_INDEX_HINT_THRESHOLD:
+                result["hint"] = (
+                    f"{table_name}.{column_name} has been searched {_search_scan_counts[key]} times "
+                    f"with a sequential scan; create_search_index can build a trigram index for it"
+                )
+        return result
     except Exception as e:
         logger.error(f"Search failed: {str(e)}")
         return {"error": str(e), "table": table_name, "column": column_name, "search_term": search_term}
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
+@instrumented
+async def create_search_index(table_name: str, column_name: str, schema_name: str = 'public') -> Dict[str, Any]:
+    """Build a pg_trgm GIN index (CREATE INDEX CONCURRENTLY) so search_table can use it.
+    Only available when the server runs with ALLOW_INDEX_CREATION=true."""
+    target = f"{schema_name}.{table_name}.{column_name}"
+    if not ALLOW_INDEX_CREATION:
+        return {"status": "error", "message": "Index creation is disabled; set ALLOW_INDEX_CREATION=true", "column": target}
+    index_name = f"{table_name}_{column_name}_trgm_idx"[:63]
+    statement = (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote_ident(index_name)} "
+        f"ON {qualified_name(schema_name, table_name)} USING gin ({quote_ident(column_name)} gin_trgm_ops)"
+    )
+    try:
+        async with get_db_connection() as conn:
+            has_trgm = await conn.fetchval("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            if not has_trgm:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            # CONCURRENTLY cannot run in a transaction and may take a while on large tables
+            await conn.execute(statement, timeout=SEARCH_INDEX_BUILD_TIMEOUT)
+        _search_scan_counts.pop((current_database(), table_name, column_name), None)
+        _search_scan_counts.pop((current_database(), f"{schema_name}.{table_name}", column_name), None)
+        logger.info(f"Created search index {index_name} on {target}")
+        return {"status": "success", "index_name": index_name, "statement": statement, "column": target}
+    except Exception as e:
+        logger.error(f"Failed to create search index on {target}: {e}")
+        return {"status": "error", "message": str(e), "statement": statement, "column": target}
+
+@mcp.tool
+@instrumented
 async def list_databases(random_string: str = "dummy") -> List[Dict[str, Any]]:
     """List all databases that the user has access to"""
-    conn = None
     try:
-        conn = await get_db_connection()
         query = """
         SELECT 
             datname as database_name,
@@ -295,21 +2034,18 @@ async def list_databases(random_string: str = "dummy") -> List[Dict[str, Any]]:
         WHERE datistemplate = false
         ORDER BY datname;
         """
-        rows = await conn.fetch(query)
+        async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+            rows = await conn.fetch(query)
         return [dict(row) for row in rows]
     except Exception as e:
         logger.error(f"Error listing databases: {e}")
         return []
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
+@instrumented
 async def list_schemas(database_name: Optional[str] = None) -> List[Dict[str, Any]]:
     """List all schemas in the current database or a specified database"""
-    conn = None
     try:
-        conn = await get_db_connection()
         query = """
         SELECT 
             schema_name,
@@ -324,22 +2060,19 @@ async def list_schemas(database_name: Optional[str] = None) -> List[Dict[str, An
             CASE WHEN schema_name = 'public' THEN 1 ELSE 2 END,
             schema_name;
         """
-        rows = await conn.fetch(query)
+        async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+            rows = await conn.fetch(query)
         return [dict(row) for row in rows]
     except Exception as e:
         logger.error(f"Error listing schemas: {e}")
         return []
-    finally:
-        if conn:
-            await conn.close()
 
 
 @mcp.tool
+@instrumented
 async def get_database_info(random_string: str = "dummy") -> Dict[str, Any]:
     """Get information about the current database"""
-    conn = None
     try:
-        conn = await get_db_connection()
         query = """
         SELECT 
             current_database() as database_name,
@@ -349,83 +2082,133 @@ async def get_database_info(random_string: str = "dummy") -> Dict[str, Any]:
             current_setting('server_version') as server_version,
             pg_size_pretty(pg_database_size(current_database())) as database_size;
         """
-        row = await conn.fetchrow(query)
+        async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+            row = await conn.fetchrow(query)
         return dict(row) if row else {}
     except Exception as e:
         logger.error(f"Error getting database info: {e}")
         return {}
-    finally:
-        if conn:
-            await conn.close()
 
 
+TABLE_INFO_COLUMNS = """
+SELECT 
+    n.nspname as schema_name,
+    c.relname as table_name,
+    pg_get_userbyid(c.relowner) as table_owner,
+    c.reltuples::bigint as estimated_row_count,
+    c.relpages as page_count,
+    pg_size_pretty(pg_total_relation_size(c.oid)) as total_size,
+    pg_size_pretty(pg_relation_size(c.oid)) as table_size,
+    pg_size_pretty(pg_indexes_size(c.oid)) as index_size,
+    pg_total_relation_size(c.oid) as total_bytes,
+    pg_relation_size(c.oid) as table_bytes,
+    pg_indexes_size(c.oid) as index_bytes,
+    s.n_live_tup as live_row_count,
+    s.n_dead_tup as dead_row_count,
+    greatest(s.last_analyze, s.last_autoanalyze) as last_analyzed,
+    greatest(s.last_vacuum, s.last_autovacuum) as last_vacuumed,
+    (
+        SELECT json_agg(json_build_object(
+            'index_name', i.relname,
+            'index_definition', pg_get_indexdef(i.oid)
+        ) ORDER BY i.relname)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = c.oid
+    ) as indexes
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid
+WHERE c.relkind IN ('r', 'p')
+"""
+
+# Selected tables, passed as two parallel arrays of schema and table names
+TABLE_INFO_QUERY = TABLE_INFO_COLUMNS + """
+AND (n.nspname, c.relname) IN (SELECT * FROM unnest($1::text[], $2::text[]))
+ORDER BY n.nspname, c.relname
+"""
+
+ALL_TABLES_INFO_QUERY = TABLE_INFO_COLUMNS + """
+AND n.nspname NOT IN ('information_schema', 'pg_catalog', 'pg_toast')
+ORDER BY n.nspname, c.relname
+"""
+
+def _table_info_row(row: asyncpg.Record) -> Dict[str, Any]:
+    info = dict(row)
+    info['indexes'] = json.loads(info['indexes']) if info['indexes'] else []
+    for key in ('last_analyzed', 'last_vacuumed'):
+        if info[key] is not None:
+            info[key] = info[key].isoformat()
+    return info
+
+async def fetch_table_info(conn, tables: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Sizes, row estimates, maintenance times and indexes for (schema, table) pairs in one round trip"""
+    rows = await conn.fetch_prepared(
+        TABLE_INFO_QUERY,
+        [schema for schema, _ in tables],
+        [table for _, table in tables]
+    )
+    return [_table_info_row(row) for row in rows]
+
+TABLE_INFO_CHUNK_SIZE = int(os.getenv("TABLE_INFO_CHUNK_SIZE", "50"))
+
+def _split_table_name(name: str, default_schema: str) -> Tuple[str, str]:
+    schema, _, table = name.rpartition('.')
+    return (schema or default_schema, table)
+
 @mcp.tool
+@instrumented
 async def get_table_info(table_name: str, schema_name: str = 'public') -> Dict[str, Any]:
-    """Get detailed information about a specific table including size, row count, and indexes"""
-    conn = None
+    """Get detailed information about a specific table including size, row count, and indexes.
+    Row counts are the planner's estimates (reltuples), so no table scan is needed."""
     try:
-        conn = await get_db_connection()
-        
-        table_info_query = """
-        SELECT 
-            schemaname as schema_name,
-            tablename as table_name,
-            tableowner as table_owner,
-            pg_size_pretty(pg_total_relation_size(schemaname||'.'||tablename)) as total_size,
-            pg_size_pretty(pg_relation_size(schemaname||'.'||tablename)) as table_size
-        FROM pg_tables 
-        WHERE tablename = $1 AND schemaname = $2;
-        """
-        
-        row_count_query = """
-        SELECT reltuples::bigint as estimated_row_count
-        FROM pg_class 
-        WHERE relname = $1 
-        AND relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = $2);
-        """
-        
-        indexes_query = """
-        SELECT 
-            indexname as index_name,
-            indexdef as index_definition
-        FROM pg_indexes 
-        WHERE tablename = $1 AND schemaname = $2
-        ORDER BY indexname;
-        """
-        
-        table_info = await conn.fetchrow(table_info_query, table_name, schema_name)
-        row_count = await conn.fetchrow(row_count_query, table_name, schema_name)
-        indexes = await conn.fetch(indexes_query, table_name, schema_name)
-        
-        result = {}
-        if table_info:
-            result.update(dict(table_info))
-        if row_count:
-            result['estimated_row_count'] = row_count['estimated_row_count']
-        
-        result['indexes'] = [dict(idx) for idx in indexes]
-        
-        return result
+        async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+            tables = await fetch_table_info(conn, [(schema_name, table_name)])
+        return tables[0] if tables else {"indexes": []}
     except Exception as e:
         logger.error(f"Error getting table info for {schema_name}.{table_name}: {e}")
         return {}
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
+@instrumented
+async def get_tables_info(table_names: List[str], schema_name: str = 'public') -> Dict[str, Any]:
+    """Get size, estimated row count, last analyze/vacuum times and indexes for many tables in one call.
+    Names may be schema-qualified ("schema.table"); unqualified names use schema_name."""
+    requested = [_split_table_name(name, schema_name) for name in table_names]
+    try:
+        async def fetch_chunk(chunk: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+            async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+                return await fetch_table_info(conn, chunk)
+        
+        # Size functions stat every relation file, so large lists are split across connections
+        chunks = [requested[i:i + TABLE_INFO_CHUNK_SIZE] for i in range(0, len(requested), TABLE_INFO_CHUNK_SIZE)]
+        tables = [table for chunk in await gather_bounded([fetch_chunk(c) for c in chunks], STATS_MAX_PARALLEL)
+                  for table in chunk]
+        
+        found = {(t['schema_name'], t['table_name']) for t in tables}
+        missing = [f"{schema}.{table}" for schema, table in requested if (schema, table) not in found]
+        return {
+            "tables": tables,
+            "table_count": len(tables),
+            "missing": missing
+        }
+    except Exception as e:
+        logger.error(f"Error getting table info for {len(requested)} tables: {e}")
+        return {"tables": [], "table_count": 0, "error": str(e)}
+
+@mcp.tool
+@instrumented
 async def test_connection(random_string: str = "dummy") -> Dict[str, Any]:
     """Test database connection and return connection status"""
-    conn = None
     try:
-        conn = await get_db_connection()
-        result = await conn.fetchval("SELECT 1")
+        async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+            result = await conn.fetchval("SELECT 1")
         
         return {
             "status": "success",
             "message": "Database connection successful",
             "test_query_result": result,
-            "database": DB_NAME,
+            "database": current_database(),
             "host": DB_HOST,
             "port": DB_PORT,
             "user": DB_USER
@@ -436,77 +2219,86 @@ async def test_connection(random_string: str = "dummy") -> Dict[str, Any]:
         return {
             "status": "error",
             "message": f"Database connection failed: {str(e)}",
-            "database": DB_NAME,
+            "database": current_database(),
             "host": DB_HOST,
             "port": DB_PORT,
             "user": DB_USER
         }
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
+@instrumented
 async def switch_database(database_name: str) -> Dict[str, Any]:
-    """Switch to a different database"""
-    global DB_NAME
-    old_db = DB_NAME
-    DB_NAME = database_name
+    """Switch this session to a different database. Other sessions keep their database,
+    and the target's connection pool stays warm, so switching back and forth is cheap."""
+    old_db = current_database()
     
-    # Test the new connection
-    conn = None
+    # Test the new connection before switching (reuses the target database's pool if it is already open)
     try:
-        conn = await get_db_connection()
-        result = await conn.fetchval("SELECT current_database()")
+        async with get_db_connection(database_name, priority=PRIORITY_CATALOG) as conn:
+            result = await conn.fetchval("SELECT current_database()")
+        per_session = set_current_database(database_name)
         
         return {
             "status": "success",
             "message": f"Successfully switched to database: {database_name}",
             "previous_database": old_db,
-            "current_database": result
+            "current_database": result,
+            "scope": "session" if per_session else "server"
         }
     except Exception as e:
-        # Revert on failure
-        DB_NAME = old_db
         logger.error(f"Failed to switch to database {database_name}: {e}")
         return {
             "status": "error",
             "message": f"Failed to switch to database {database_name}: {str(e)}",
             "current_database": old_db
         }
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
-async def query_database(database_name: str, query: str, limit: int = 100) -> Dict[str, Any]:
-    """Execute a query on a specific database without switching context"""
+@instrumented
+async def query_database(database_name: str, query: str, limit: int = 100, page_size: Optional[int] = None,
+                         use_cache: bool = True, result_format: str = "rows",
+                         timeout_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Execute a query on a specific database without switching context.
+    Pass page_size to page through large results with fetch_next_page, use_cache=False
+    to bypass the result cache, result_format to pick the encoding and timeout_seconds
+    to change the statement timeout (see execute_query)."""
     # Basic safety check - only allow SELECT statements
     query_stripped = query.strip().upper()
     if not query_stripped.startswith('SELECT'):
         return {"error": "Only SELECT statements are allowed for safety"}
+    if result_format not in RESULT_FORMATS:
+        return {"error": f"result_format must be one of {', '.join(RESULT_FORMATS)}"}
     
-    conn = None
     try:
-        conn = await get_db_connection(database_name)
+        if page_size:
+            result = await open_paged_query(query.rstrip().rstrip(';'), page_size, database_name,
+                                            timeout=query_timeout("query_database", timeout_seconds))
+            logger.info(f"Paged query opened on {database_name}: {result['row_count']} rows in first page")
+            return format_result(result, result_format)
         
         # Add LIMIT clause if not present
         if 'LIMIT' not in query_stripped:
             query = f"{query.rstrip(';')} LIMIT {limit}"
         
-        # Add timeout for query execution
-        rows = await asyncio.wait_for(conn.fetch(query), timeout=60.0)
-        
-        # Convert rows to list of dictionaries
-        result_data = [dict(row) for row in rows]
+        result_data, cached, warning = await fetch_rows(
+            query, database_name, limit=limit, use_cache=use_cache,
+            timeout=query_timeout("query_database", timeout_seconds)
+        )
         
         result = {
             "rows": result_data,
             "row_count": len(result_data),
             "query": query,
-            "database": database_name
+            "database": database_name,
+            "cached": cached
         }
+        if warning:
+            result["cost_warning"] = warning
         logger.info(f"Query executed successfully on {database_name}: {len(result_data)} rows returned")
-        return result
+        return format_result(result, result_format)
+    except QueryRejected as e:
+        logger.warning(f"{e}: {query}")
+        return {"error": str(e), "query": query, "database": database_name, "cost_guard": e.report}
     except asyncio.TimeoutError:
         error_msg = "Query execution timed out"
         logger.error(f"Query execution timed out on {database_name}: {query}")
@@ -515,29 +2307,237 @@ async def query_database(database_name: str, query: str, limit: int = 100) -> Di
         error_msg = str(e)
         logger.error(f"Query execution failed on {database_name}: {error_msg}")
         return {"error": error_msg, "query": query, "database": database_name}
-    finally:
-        if conn:
-            try:
-                await conn.close()
-            except Exception:
-                pass  # Ignore close errors
+
+FANOUT_MAX_PARALLEL = int(os.getenv("FANOUT_MAX_PARALLEL", "4"))
+FANOUT_MAX_DATABASES = int(os.getenv("FANOUT_MAX_DATABASES", "50"))
+
+FANOUT_DATABASES_QUERY = """
+SELECT datname
+FROM pg_database
+WHERE datistemplate = false
+AND datallowconn
+AND has_database_privilege(datname, 'CONNECT')
+AND datname LIKE $1
+ORDER BY datname
+"""
+
+async def _query_one_database(database_name: str, query: str, timeout: float) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        async with get_db_connection(database_name, read_only=True, transient=True) as conn:
+            async with read_only_statement(conn, database_name, timeout):
+                _, warning = await query_guard.check(conn, database_name, query)
+                rows = await conn.fetch(query, timeout=timeout + 5)
+        result = {
+            "status": "success",
+            "rows": [dict(row) for row in rows],
+            "row_count": len(rows),
+            "elapsed_seconds": round(time.perf_counter() - start, 4)
+        }
+        if warning:
+            result["cost_warning"] = warning
+        return result
+    except QueryRejected as e:
+        return {"status": "error", "error": str(e), "cost_guard": e.report,
+                "elapsed_seconds": round(time.perf_counter() - start, 4)}
+    except asyncio.TimeoutError:
+        return {"status": "error", "error": f"Timed out after {timeout}s",
+                "elapsed_seconds": round(time.perf_counter() - start, 4)}
+    except Exception as e:
+        return {"status": "error", "error": str(e), "elapsed_seconds": round(time.perf_counter() - start, 4)}
 
 @mcp.tool
-async def get_table_statistics(table_name: str, schema_name: str = 'public', database_name: str = None) -> Dict[str, Any]:
-    """Get comprehensive statistics for a table including count, min, max, avg, median"""
-    conn = None
-    try:
-        conn = await get_db_connection(database_name)
-        
-        # Get table structure to identify numeric columns
-        columns_query = """
-        SELECT column_name, data_type 
-        FROM information_schema.columns 
-        WHERE table_name = $1 AND table_schema = $2
-        AND data_type IN ('integer', 'bigint', 'numeric', 'decimal', 'real', 'double precision')
-        ORDER BY ordinal_position
+@instrumented
+async def query_many_databases(query: str, databases: Optional[List[str]] = None, database_pattern: str = None,
+                               limit: int = 100, timeout_per_database: Optional[float] = None,
+                               max_parallel: int = FANOUT_MAX_PARALLEL, merge: bool = True,
+                               ctx: Context = None) -> Dict[str, Any]:
+    """Run one read-only SELECT on many databases concurrently, e.g. the same metric on every tenant.
+    Target either an explicit list of databases or a SQL LIKE database_pattern (e.g. 'tenant_%').
+    With merge=True the rows of all databases come back in one list, each tagged with its source
+    in a "_database" key (so a result column named "database" is kept); otherwise results are
+    grouped per database. A failing or slow database (timeout_per_database,
+    a statement timeout enforced by Postgres) only fails its own entry."""
+    # Basic safety check - only allow SELECT statements
+    query_stripped = query.strip().upper()
+    if not query_stripped.startswith('SELECT'):
+        return {"error": "Only SELECT statements are allowed for safety"}
+    if not databases and not database_pattern:
+        return {"error": "Pass either databases or database_pattern"}
+    
+    # Add LIMIT clause if not present
+    if 'LIMIT' not in query_stripped:
+        query = f"{query.rstrip(';')} LIMIT {limit}"
+    
+    try:
+        targets = list(dict.fromkeys(databases or []))
+        if database_pattern:
+            async with get_db_connection(priority=PRIORITY_CATALOG) as conn:
+                rows = await conn.fetch_prepared(FANOUT_DATABASES_QUERY, database_pattern)
+            targets += [row['datname'] for row in rows if row['datname'] not in targets]
+        if len(targets) > FANOUT_MAX_DATABASES:
+            return {"error": f"{len(targets)} databases match; at most {FANOUT_MAX_DATABASES} per call",
+                    "query": query}
+        
+        timeout = query_timeout("query_many_databases", timeout_per_database)
+        done = 0
+        
+        async def run(database_name: str) -> Dict[str, Any]:
+            nonlocal done
+            result = await _query_one_database(database_name, query, timeout)
+            done += 1
+            if ctx is not None:
+                await ctx.report_progress(done, len(targets))
+            return result
+        
+        start = time.perf_counter()
+        try:
+            results = await gather_bounded([run(db) for db in targets], max(1, min(max_parallel, FANOUT_MAX_PARALLEL)))
+        finally:
+            await close_transient_pools(targets)
+        by_database = dict(zip(targets, results))
+        
+        summary = {
+            db: {key: value for key, value in result.items() if key != "rows"}
+            for db, result in by_database.items()
+        }
+        response = {
+            "query": query,
+            "database_count": len(targets),
+            "succeeded": sum(1 for r in results if r["status"] == "success"),
+            "failed": sum(1 for r in results if r["status"] != "success"),
+            "elapsed_seconds": round(time.perf_counter() - start, 4)
+        }
+        if merge:
+            merged = [
+                {**row, "_database": db}
+                for db, result in by_database.items()
+                for row in result.get("rows", [])
+            ]
+            response.update({"rows": merged, "row_count": len(merged), "databases": summary})
+        else:
+            response["results"] = by_database
+        logger.info(f"Fan-out query ran on {len(targets)} databases: {response['failed']} failed")
+        return response
+    except Exception as e:
+        logger.error(f"Fan-out query failed: {e}")
+        return {"error": str(e), "query": query}
+
+NUMERIC_TYPES = ('smallint', 'integer', 'bigint', 'numeric', 'real', 'double precision')
+
+def _histogram_quantile(bounds: List[float], fraction: float) -> Optional[float]:
+    # pg_stats histogram buckets hold equal numbers of rows, so bound i sits at quantile i/(n-1)
+    if not bounds:
+        return None
+    return bounds[round(fraction * (len(bounds) - 1))]
+
+async def _estimate_statistics(conn, schema_name: str, table_name: str, numeric_columns: List[Dict[str, Any]],
+                               include_percentiles: bool) -> Dict[str, Any]:
+    """Approximate statistics from the planner's pg_stats histograms, without touching the table"""
+    total_rows = await conn.fetchval_prepared(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = $1::regclass",
+        qualified_name(schema_name, table_name)
+    )
+    # Only the numeric columns: histograms of text, date or uuid columns do not cast to float8[]
+    rows = await conn.fetch_prepared(
         """
-        numeric_columns = await conn.fetch(columns_query, table_name, schema_name)
+        SELECT attname, null_frac, histogram_bounds::text::float8[] as bounds
+        FROM pg_stats
+        WHERE schemaname = $1 AND tablename = $2 AND attname = ANY($3::text[])
+        """,
+        schema_name, table_name, [col['column_name'] for col in numeric_columns]
+    )
+    by_column = {row['attname']: row for row in rows}
+    
+    column_stats = []
+    for col in numeric_columns:
+        row = by_column.get(col['column_name'])
+        bounds = list(row['bounds'] or []) if row else []
+        stats = {
+            "column_name": col['column_name'],
+            "data_type": col['data_type'],
+            "min_value": bounds[0] if bounds else None,
+            "max_value": bounds[-1] if bounds else None,
+            "avg_value": None,
+            "median_value": _histogram_quantile(bounds, 0.5),
+            "non_null_count": round(max(total_rows, 0) * (1 - row['null_frac'])) if row else None
+        }
+        if include_percentiles:
+            stats["p5_value"] = _histogram_quantile(bounds, 0.05)
+            stats["p95_value"] = _histogram_quantile(bounds, 0.95)
+        if not row:
+            stats["message"] = "No pg_stats entry for this column; run ANALYZE first"
+        column_stats.append(stats)
+    
+    return {"total_rows": total_rows, "numeric_columns": column_stats}
+
+def _column_stats_select(columns: List[Dict[str, Any]], include_percentiles: bool, include_stddev: bool) -> str:
+    # percentile_cont sorts each column in memory but the table itself is only read once
+    select_list = ["COUNT(*) as total_rows"]
+    fractions = "ARRAY[0.5, 0.05, 0.95]" if include_percentiles else "ARRAY[0.5]"
+    for i, col in enumerate(columns):
+        col_sql = quote_ident(col['column_name'])
+        select_list += [
+            f"MIN({col_sql}) as min_{i}",
+            f"MAX({col_sql}) as max_{i}",
+            f"AVG({col_sql}) as avg_{i}",
+            f"COUNT({col_sql}) as count_{i}",
+            f"percentile_cont({fractions}) WITHIN GROUP (ORDER BY {col_sql}) as pct_{i}"
+        ]
+        if include_stddev:
+            select_list.append(f"stddev_samp({col_sql}) as stddev_{i}")
+    return ", ".join(select_list)
+
+def _column_stats_rows(stats: asyncpg.Record, columns: List[Dict[str, Any]], include_percentiles: bool,
+                       include_stddev: bool) -> List[Dict[str, Any]]:
+    column_stats = []
+    for i, col in enumerate(columns):
+        percentiles = stats[f'pct_{i}'] or []
+        col_stats = {
+            "column_name": col['column_name'],
+            "data_type": col['data_type'],
+            "min_value": stats[f'min_{i}'],
+            "max_value": stats[f'max_{i}'],
+            "avg_value": float(stats[f'avg_{i}']) if stats[f'avg_{i}'] is not None else None,
+            "median_value": percentiles[0] if percentiles else None,
+            "non_null_count": stats[f'count_{i}']
+        }
+        if include_percentiles:
+            col_stats["p5_value"] = percentiles[1] if percentiles else None
+            col_stats["p95_value"] = percentiles[2] if percentiles else None
+        if include_stddev:
+            stddev = stats[f'stddev_{i}']
+            col_stats["stddev_value"] = float(stddev) if stddev is not None else None
+        column_stats.append(col_stats)
+    return column_stats
+
+@mcp.tool
+@instrumented
+async def get_table_statistics(table_name: str, schema_name: str = 'public', database_name: str = None,
+                               mode: str = "exact", sample_percent: float = 1.0,
+                               include_percentiles: bool = False, include_stddev: bool = False,
+                               parallelism: int = 1) -> Dict[str, Any]:
+    """Get comprehensive statistics for a table including count, min, max, avg, median.
+    All numeric columns are aggregated in a single table scan. mode can be:
+    - "exact": scan the whole table
+    - "sample": scan a TABLESAMPLE SYSTEM sample of sample_percent percent of the table pages
+    - "estimate": read the planner's pg_stats histograms instantly (no avg, approximate bounds)
+    include_percentiles adds p5/p95 and include_stddev adds the sample standard deviation.
+    For wide tables, parallelism > 1 splits the columns into that many groups aggregated
+    concurrently on separate connections (capped by STATS_MAX_PARALLEL): more scans, but
+    the per-column sorts run on several backends at once."""
+    if mode not in ("exact", "sample", "estimate"):
+        return {
+            "table_name": f"{schema_name}.{table_name}",
+            "error": "mode must be one of 'exact', 'sample' or 'estimate'"
+        }
+    try:
+        catalog = await get_schema_catalog(database_name)
+        table = catalog.get((schema_name, table_name))
+        numeric_columns = [
+            col for col in (table["columns"] if table else [])
+            if col['data_type'] in NUMERIC_TYPES
+        ]
         
         if not numeric_columns:
             return {
@@ -546,58 +2546,52 @@ async def get_table_statistics(table_name: str, schema_name: str = 'public', dat
                 "columns": []
             }
         
-        # Get basic count
-        count_query = f"SELECT COUNT(*) as total_rows FROM {schema_name}.{table_name}"
-        total_rows = await conn.fetchval(count_query)
-        
         statistics = {
             "table_name": f"{schema_name}.{table_name}",
-            "total_rows": total_rows,
-            "numeric_columns": []
+            "mode": mode
         }
         
-        # Get statistics for each numeric column
-        for col in numeric_columns:
-            col_name = col['column_name']
-            col_type = col['data_type']
-            
-            # Get min, max, avg
-            stats_query = f"""
-            SELECT 
-                MIN({col_name}) as min_value,
-                MAX({col_name}) as max_value,
-                AVG({col_name}) as avg_value,
-                COUNT({col_name}) as non_null_count
-            FROM {schema_name}.{table_name}
-            WHERE {col_name} IS NOT NULL
-            """
-            stats = await conn.fetchrow(stats_query)
-            
-            # Get median using a more robust approach
-            median_query = f"""
-            SELECT {col_name} as median_value
-            FROM {schema_name}.{table_name}
-            WHERE {col_name} IS NOT NULL
-            ORDER BY {col_name}
-            LIMIT 1 OFFSET (
-                SELECT COUNT(*) / 2 
-                FROM {schema_name}.{table_name} 
-                WHERE {col_name} IS NOT NULL
-            )
-            """
-            median_result = await conn.fetchrow(median_query)
-            median_value = median_result['median_value'] if median_result else None
-            
-            column_stats = {
-                "column_name": col_name,
-                "data_type": col_type,
-                "min_value": stats['min_value'],
-                "max_value": stats['max_value'],
-                "avg_value": float(stats['avg_value']) if stats['avg_value'] else None,
-                "median_value": median_value,
-                "non_null_count": stats['non_null_count']
-            }
-            statistics["numeric_columns"].append(column_stats)
+        if mode == "estimate":
+            async with get_db_connection(database_name, priority=PRIORITY_CATALOG) as conn:
+                statistics.update(await _estimate_statistics(
+                    conn, schema_name, table_name, numeric_columns, include_percentiles
+                ))
+            return statistics
+        
+        from_clause = qualified_name(schema_name, table_name)
+        if mode == "sample":
+            sample_percent = min(max(sample_percent, 0.0001), 100.0)
+            # A shared seed makes every column group read the same sample
+            from_clause += f" TABLESAMPLE SYSTEM ({sample_percent}) REPEATABLE ({random.randint(0, 2**31 - 1)})"
+        
+        parallelism = max(1, min(parallelism, STATS_MAX_PARALLEL, len(numeric_columns)))
+        group_size = -(-len(numeric_columns) // parallelism)
+        groups = [numeric_columns[i:i + group_size] for i in range(0, len(numeric_columns), group_size)]
+        
+        db_name = database_name or current_database()
+        timeout = query_timeout("get_table_statistics")
+        
+        async def aggregate(columns: List[Dict[str, Any]]) -> asyncpg.Record:
+            stats_query = f"SELECT {_column_stats_select(columns, include_percentiles, include_stddev)} FROM {from_clause}"
+            async with get_db_connection(db_name, read_only=True) as conn, \
+                    read_only_statement(conn, db_name, timeout):
+                return await conn.fetchrow(stats_query)
+        
+        group_stats = await gather_bounded([aggregate(columns) for columns in groups], parallelism)
+        total_rows = group_stats[0]['total_rows']
+        
+        if mode == "sample":
+            statistics["sample_percent"] = sample_percent
+            statistics["sampled_rows"] = total_rows
+            statistics["total_rows"] = round(total_rows * 100.0 / sample_percent)
+        else:
+            statistics["total_rows"] = total_rows
+        if len(groups) > 1:
+            statistics["parallel_groups"] = len(groups)
+        
+        statistics["numeric_columns"] = []
+        for columns, stats in zip(groups, group_stats):
+            statistics["numeric_columns"] += _column_stats_rows(stats, columns, include_percentiles, include_stddev)
         
         return statistics
         
@@ -607,39 +2601,15 @@ async def get_table_statistics(table_name: str, schema_name: str = 'public', dat
             "table_name": f"{schema_name}.{table_name}",
             "error": str(e)
         }
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
+@instrumented
 async def get_foreign_keys(table_name: str, schema_name: str = 'public', database_name: str = None) -> Dict[str, Any]:
     """Get foreign key relationships for a table"""
-    conn = None
     try:
-        conn = await get_db_connection(database_name)
-        
-        query = """
-        SELECT
-            tc.constraint_name,
-            tc.table_name,
-            kcu.column_name,
-            ccu.table_name AS foreign_table_name,
-            ccu.column_name AS foreign_column_name
-        FROM information_schema.table_constraints AS tc
-        JOIN information_schema.key_column_usage AS kcu
-            ON tc.constraint_name = kcu.constraint_name
-            AND tc.table_schema = kcu.table_schema
-        JOIN information_schema.constraint_column_usage AS ccu
-            ON ccu.constraint_name = tc.constraint_name
-            AND ccu.table_schema = tc.table_schema
-        WHERE tc.constraint_type = 'FOREIGN KEY'
-        AND tc.table_name = $1
-        AND tc.table_schema = $2
-        ORDER BY tc.constraint_name, kcu.ordinal_position
-        """
-        
-        rows = await conn.fetch(query, table_name, schema_name)
-        foreign_keys = [dict(row) for row in rows]
+        catalog = await get_schema_catalog(database_name)
+        table = catalog.get((schema_name, table_name))
+        foreign_keys = list(table["foreign_keys"]) if table else []
         
         return {
             "table_name": f"{schema_name}.{table_name}",
@@ -653,30 +2623,193 @@ async def get_foreign_keys(table_name: str, schema_name: str = 'public', databas
             "table_name": f"{schema_name}.{table_name}",
             "error": str(e)
         }
-    finally:
-        if conn:
-            await conn.close()
+
+# Schema snapshots - the whole database model in one payload, kept on disk under a key
+# derived from the catalog fingerprint, so a restarted server can serve it without rebuilding
+SCHEMA_SNAPSHOT_DIR = os.path.expanduser(os.getenv("SCHEMA_SNAPSHOT_DIR", "~/.cache/postgres_mcp/schema_snapshots"))
+SCHEMA_SNAPSHOT_COLUMN_FIELDS = ["name", "type", "nullable", "default"]
+
+SNAPSHOT_EXTRAS_QUERY = """
+SELECT
+    n.nspname as table_schema,
+    c.relname as table_name,
+    c.reltuples::bigint as estimated_rows,
+    (
+        SELECT json_agg(pg_get_indexdef(i.indexrelid) ORDER BY i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = c.oid
+    ) as indexes
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+AND n.nspname NOT IN ('information_schema', 'pg_catalog', 'pg_toast')
+AND n.nspname NOT LIKE 'pg_temp_%'
+"""
+
+DATABASE_OID_QUERY = "SELECT oid::bigint FROM pg_database WHERE datname = current_database()"
+
+RELKIND_NAMES = {'r': 'table', 'p': 'partitioned table', 'v': 'view', 'm': 'materialized view', 'f': 'foreign table'}
+
+_schema_snapshots: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+def _snapshot_key(database: str, database_oid: int, fingerprint: Tuple) -> str:
+    identity = json.dumps([DB_HOST, DB_PORT, database, database_oid, list(fingerprint)])
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:24]
+
+def _snapshot_stem(database: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', database)
+
+def _snapshot_path(database: str, key: str) -> str:
+    return os.path.join(SCHEMA_SNAPSHOT_DIR, f"{_snapshot_stem(database)}-{key}.json")
+
+def _read_snapshot(database: str, key: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_snapshot_path(database, key)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable schema snapshot for {database}: {e}")
+        return None
+
+def _write_snapshot(database: str, key: str, snapshot: Dict[str, Any]):
+    """Write a snapshot atomically and drop the older snapshots of the same database"""
+    path = _snapshot_path(database, key)
+    try:
+        os.makedirs(SCHEMA_SNAPSHOT_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"), default=str)
+        os.replace(tmp_path, path)
+        older = re.compile(re.escape(_snapshot_stem(database)) + r"-[0-9a-f]{24}\.json")
+        for name in os.listdir(SCHEMA_SNAPSHOT_DIR):
+            if older.fullmatch(name) and name != os.path.basename(path):
+                os.remove(os.path.join(SCHEMA_SNAPSHOT_DIR, name))
+    except OSError as e:
+        logger.warning(f"Could not write schema snapshot for {database}: {e}")
+
+def _build_snapshot(database: str, key: str, catalog: Dict[Tuple[str, str], Dict[str, Any]],
+                    extras: List[asyncpg.Record]) -> Dict[str, Any]:
+    extras_by_table = {(row['table_schema'], row['table_name']): row for row in extras}
+    tables = []
+    for (schema_name, table_name), table in catalog.items():
+        extra = extras_by_table.get((schema_name, table_name))
+        estimated_rows = extra['estimated_rows'] if extra else None
+        foreign_keys: Dict[str, Dict[str, Any]] = {}
+        for fk in table["foreign_keys"]:
+            constraint = foreign_keys.setdefault(fk['constraint_name'], {
+                "name": fk['constraint_name'],
+                "columns": [],
+                "references": f"{fk['foreign_schema_name']}.{fk['foreign_table_name']}",
+                "referenced_columns": []
+            })
+            constraint["columns"].append(fk['column_name'])
+            constraint["referenced_columns"].append(fk['foreign_column_name'])
+        tables.append({
+            "schema": schema_name,
+            "name": table_name,
+            "kind": RELKIND_NAMES.get(table["relkind"], table["relkind"]),
+            # reltuples is -1 (or 0 before Postgres 14) until the table is vacuumed or analyzed
+            "estimated_rows": estimated_rows if estimated_rows and estimated_rows > 0 else None,
+            "columns": [
+                [column['column_name'], column['data_type'], column['is_nullable'] == 'YES', column['column_default']]
+                for column in table["columns"]
+            ],
+            "primary_key": table["primary_key"],
+            "foreign_keys": list(foreign_keys.values()),
+            "indexes": json.loads(extra['indexes']) if extra and extra['indexes'] else []
+        })
+    return {
+        "database": database,
+        "snapshot_key": key,
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "column_fields": SCHEMA_SNAPSHOT_COLUMN_FIELDS,
+        "table_count": len(tables),
+        "tables": tables
+    }
+
+@mcp.tool
+@instrumented
+async def get_schema_snapshot(database_name: str = None, schema_name: str = None,
+                              refresh: bool = False) -> Dict[str, Any]:
+    """Get the whole database model in one call: every table and view with its columns
+    (as [name, type, nullable, default] lists), primary key, foreign keys, index definitions
+    and estimated row count. Use it at the start of a session instead of calling
+    list_tables/describe_table/get_foreign_keys per table. Snapshots are cached in memory and
+    on disk until the catalog changes; row estimates are as of generated_at.
+    Pass schema_name to keep one schema, refresh=True to rebuild from the catalog."""
+    db_name = database_name or current_database()
+    try:
+        async with get_db_connection(db_name, priority=PRIORITY_CATALOG) as conn:
+            fingerprint = tuple(await conn.fetchrow_prepared(CATALOG_FINGERPRINT_QUERY))
+            database_oid = await conn.fetchval_prepared(DATABASE_OID_QUERY)
+        key = _snapshot_key(db_name, database_oid, fingerprint)
+        
+        source = "memory"
+        snapshot = None
+        cached = _schema_snapshots.get(db_name)
+        if not refresh and cached and cached[0] == key:
+            snapshot = cached[1]
+        if snapshot is None and not refresh:
+            snapshot = _read_snapshot(db_name, key)
+            source = "disk"
+        if snapshot is None:
+            source = "database"
+            if refresh:
+                invalidate_schema_cache(db_name)
+            catalog = await get_schema_catalog(db_name)
+            # Key the snapshot on the fingerprint the catalog was actually loaded with
+            key = _snapshot_key(db_name, database_oid, _schema_cache[db_name]["fingerprint"])
+            async with get_db_connection(db_name, priority=PRIORITY_CATALOG) as conn:
+                extras = await conn.fetch_prepared(SNAPSHOT_EXTRAS_QUERY)
+            snapshot = _build_snapshot(db_name, key, catalog, extras)
+            _write_snapshot(db_name, key, snapshot)
+            logger.info(f"Built schema snapshot for {db_name}: {snapshot['table_count']} relations")
+        _schema_snapshots[db_name] = (key, snapshot)
+        
+        if schema_name:
+            tables = [table for table in snapshot["tables"] if table["schema"] == schema_name]
+            snapshot = {**snapshot, "table_count": len(tables), "tables": tables, "schema_name": schema_name}
+        return {**snapshot, "source": source}
+    except Exception as e:
+        logger.error(f"Error building schema snapshot for {db_name}: {e}")
+        return {"database": db_name, "error": str(e)}
 
 @mcp.tool
+@instrumented
+async def refresh_schema_cache(database_name: str = None) -> Dict[str, Any]:
+    """Drop the cached table/column/foreign key metadata so the next call reloads it"""
+    invalidate_schema_cache(database_name)
+    if database_name:
+        _schema_snapshots.pop(database_name, None)
+    else:
+        _schema_snapshots.clear()
+    return {
+        "status": "success",
+        "message": f"Schema cache cleared for {database_name or 'all databases'}"
+    }
+
+@mcp.tool
+@instrumented
 async def explain_query(query: str, database_name: str = None) -> Dict[str, Any]:
-    """Get query execution plan for performance analysis"""
+    """Get query execution plan for performance analysis, plus the cost guard's verdict
+    (estimated cost/rows against the server's thresholds and the nodes that exceed them)"""
     # Basic safety check - only allow SELECT statements
     query_stripped = query.strip().upper()
     if not query_stripped.startswith('SELECT'):
         return {"error": "Only SELECT statements are allowed for safety"}
     
-    conn = None
+    db_name = database_name or current_database()
     try:
-        conn = await get_db_connection(database_name)
-        
         # Get execution plan
-        explain_query_sql = f"EXPLAIN (FORMAT JSON) {query}"
-        result = await conn.fetch(explain_query_sql)
+        async with get_db_connection(db_name, priority=PRIORITY_CATALOG) as conn:
+            plan, report = await query_guard.plan(conn, db_name, query)
         
         return {
             "query": query,
-            "execution_plan": result[0]['QUERY PLAN'] if result else None,
-            "database": database_name or DB_NAME
+            "execution_plan": plan,
+            "cost_guard": {"action": query_guard.action, **report},
+            "database": db_name
         }
         
     except Exception as e:
@@ -684,13 +2817,28 @@ async def explain_query(query: str, database_name: str = None) -> Dict[str, Any]
         return {
             "query": query,
             "error": str(e),
-            "database": database_name or DB_NAME
+            "database": database_name or current_database()
         }
-    finally:
-        if conn:
-            await conn.close()
 
 @mcp.tool
+def get_performance_metrics(tool_name: str = None, reset: bool = False) -> Dict[str, Any]:
+    """Per-tool call counts, errors and latency/size histograms (avg, p50, p95, p99, max):
+    total duration, admission queue wait, connection acquire time, time holding a database
+    connection and row counts, plus result serialization time and payload bytes for the calls
+    sampled by METRICS_PAYLOAD_SAMPLE_RATE. Pass tool_name to see one tool and reset=True to start a new measurement window."""
+    summary = metrics.summary(tool_name)
+    summary["admission"] = admission.status()
+    if reset:
+        metrics.reset()
+    return summary
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """Prometheus text exposition of the tool metrics (HTTP transports only)"""
+    return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+@mcp.tool
+@instrumented
 def get_server_status(random_string: str = "dummy") -> Dict[str, Any]:
     """Simple diagnostic tool to test MCP server functionality"""
     return {
@@ -699,34 +2847,53 @@ def get_server_status(random_string: str = "dummy") -> Dict[str, Any]:
         "database_config": {
             "host": DB_HOST,
             "port": DB_PORT,
-            "database": DB_NAME,
+            "database": current_database(),
+            "default_database": DB_NAME,
             "user": DB_USER
-        }
+        },
+        "session_databases": len(_session_databases),
+        "connection_pools": get_pool_status(),
+        "open_cursors": len(_cursors),
+        "schema_cache": get_schema_cache_status(),
+        "query_cache": query_cache.status(),
+        "admission": admission.status(),
+        "query_guard": query_guard.status(),
+        "read_replicas": replica_router.status() if replica_router.enabled else None,
+        "prepared_statements": get_statement_status()
     }
 
 if __name__ == "__main__":
+    logger.info("Starting Postgres Database MCP Server...")
+    
+    # Test database connection before starting server (but don't fail startup)
+    async def startup_check():
+        try:
+            if await test_db_connection():
+                logger.info("Database connection verified. Starting MCP server...")
+            else:
+                logger.warning("Database connection test failed, but continuing to start server. Use test_connection tool to debug.")
+        except Exception as e:
+            logger.warning(f"Startup database check failed: {e}. Server will start anyway.")
+    
+    # Run the startup check and the server on the same event loop so the
+    # connection pools created along the way stay usable, and close them on exit
+    async def main():
+        await startup_check()
+        try:
+            if MCP_TRANSPORT == "stdio":
+                logger.info("Starting MCP server...")
+                await mcp.run_async()
+            else:
+                logger.info(f"Starting MCP server on {MCP_TRANSPORT}://{MCP_HOST}:{MCP_PORT} (Prometheus metrics on /metrics)...")
+                await mcp.run_async(transport=MCP_TRANSPORT, host=MCP_HOST, port=MCP_PORT)
+        finally:
+            await close_all_cursors()
+            await close_all_pools()
+    
     try:
-        logger.info("Starting Postgres Database MCP Server...")
-        
-        # Test database connection before starting server (but don't fail startup)
-        async def startup_check():
-            try:
-                if await test_db_connection():
-                    logger.info("Database connection verified. Starting MCP server...")
-                else:
-                    logger.warning("Database connection test failed, but continuing to start server. Use test_connection tool to debug.")
-            except Exception as e:
-                logger.warning(f"Startup database check failed: {e}. Server will start anyway.")
-        
-        # Run startup check
-        asyncio.run(startup_check())
-        
-        # Start the MCP server
-        logger.info("Starting MCP server...")
-        mcp.run()
-        
+        asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Server shutdown requested")
     except Exception as e:
         logger.error(f"Server startup failed: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,50 @@
+"""AdmissionController keeps its reserved slots free for catalog calls, globally and per database."""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import PRIORITY_CATALOG, AdmissionController  # noqa: E402
+
+
+async def _fill(controller, database, count, release):
+    async def hold():
+        async with controller.admit(database):
+            await release.wait()
+
+    tasks = [asyncio.create_task(hold()) for _ in range(count)]
+    await asyncio.sleep(0)
+    return tasks
+
+
+def test_reserved_slots_apply_per_database():
+    async def run():
+        controller = AdmissionController(max_concurrent=20, max_per_database=10, reserved_slots=2,
+                                         max_wait=5, max_queue=100)
+        release = asyncio.Event()
+        tasks = await _fill(controller, "db", 10, release)
+        # Only 8 queries run; the other 2 wait so the catalog slots stay free
+        assert controller.active_by_database["db"] == 8
+        assert len(controller.waiters) == 2
+        async with controller.admit("db", PRIORITY_CATALOG):
+            assert controller.active_by_database["db"] == 9
+        release.set()
+        await asyncio.gather(*tasks)
+        assert controller.active == 0
+
+    asyncio.run(run())
+
+
+def test_other_databases_are_not_held_up():
+    async def run():
+        controller = AdmissionController(max_concurrent=20, max_per_database=4, reserved_slots=1,
+                                         max_wait=5, max_queue=100)
+        release = asyncio.Event()
+        tasks = await _fill(controller, "busy", 4, release)
+        async with controller.admit("other"):
+            assert controller.active_by_database == {"busy": 3, "other": 1}
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
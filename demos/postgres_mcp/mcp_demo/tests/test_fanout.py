@@ -0,0 +1,45 @@
+"""query_many_databases against the database configured through the DB_* environment
+variables (skipped when it cannot be reached, or when the user may not create databases)."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+TARGETS = [f"mcp_test_fanout_{i}" for i in range(3)]
+
+
+def tool_fn(tool):
+    # Newer fastmcp versions wrap decorated tools in a FunctionTool object
+    return getattr(tool, "fn", tool)
+
+
+def test_fanout_closes_the_pools_it_opened():
+    async def run():
+        try:
+            async with server.get_db_connection() as conn:
+                for database in TARGETS:
+                    await conn.execute(f"DROP DATABASE IF EXISTS {database}")
+                    await conn.execute(f"CREATE DATABASE {database}")
+        except (OSError, asyncio.TimeoutError, server.asyncpg.PostgresError) as e:
+            pytest.skip(f"database not available: {e}")
+        try:
+            result = await tool_fn(server.query_many_databases)(
+                "SELECT current_database() AS database", database_pattern="mcp_test_fanout_%"
+            )
+            return result, set(server.get_pool_status())
+        finally:
+            # DROP DATABASE fails if a fan-out pool still holds a backend on it
+            async with server.get_db_connection() as conn:
+                for database in TARGETS:
+                    await conn.execute(f"DROP DATABASE IF EXISTS {database}")
+            await server.close_all_pools()
+
+    result, pools = asyncio.run(run())
+    assert result["succeeded"] == len(TARGETS)
+    assert sorted(row["_database"] for row in result["rows"]) == TARGETS
+    assert not pools & set(TARGETS)
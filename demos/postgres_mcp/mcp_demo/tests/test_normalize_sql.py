@@ -0,0 +1,37 @@
+"""normalize_sql builds the result and plan cache keys, so queries that can return different
+rows must never normalize to the same string."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import normalize_sql  # noqa: E402
+
+
+def test_collapses_whitespace_case_and_comments():
+    assert normalize_sql("SELECT *\n  FROM  T -- trailing\nWHERE /* x */ id = 1;") == \
+        normalize_sql("select * from t where id = 1")
+
+
+def test_single_quoted_literals_are_opaque():
+    assert normalize_sql("SELECT * FROM t WHERE name = 'Alice'") != \
+        normalize_sql("SELECT * FROM t WHERE name = 'ALICE'")
+    assert normalize_sql("SELECT 'a  b'") == "select 'a  b'"
+
+
+def test_dollar_quoted_literals_are_opaque():
+    assert normalize_sql("SELECT * FROM t WHERE name = $$Alice$$") != \
+        normalize_sql("SELECT * FROM t WHERE name = $$ALICE$$")
+    assert normalize_sql("SELECT $q$ It's  Here $q$") == "select $q$ It's  Here $q$"
+    # $1 is a parameter, not the start of a dollar quote
+    assert normalize_sql("SELECT $1, $2 FROM T") == "select $1, $2 from t"
+
+
+def test_quoted_identifiers_and_escape_strings_are_opaque():
+    assert normalize_sql('SELECT * FROM "Users"') != normalize_sql('SELECT * FROM "users"')
+    assert normalize_sql("SELECT E'O\\'Neil  X'") == "select E'O\\'Neil  X'"
+
+
+def test_quotes_in_comments_do_not_start_literals():
+    assert normalize_sql("SELECT 1 -- don't\nFROM T") == "select 1 from t"
+    assert normalize_sql("SELECT /* it's */ 'A'") == "select 'A'"
@@ -0,0 +1,58 @@
+"""get_table_sample against the database configured through the DB_* environment
+variables (skipped when it cannot be reached)."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+SCHEMA = "mcp_test"
+
+
+def tool_fn(tool):
+    # Newer fastmcp versions wrap decorated tools in a FunctionTool object
+    return getattr(tool, "fn", tool)
+
+
+def _run(setup_sql, table_name, **kwargs):
+    async def run():
+        try:
+            async with server.get_db_connection() as conn:
+                await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+                await conn.execute(setup_sql)
+        except (OSError, asyncio.TimeoutError, server.asyncpg.PostgresError) as e:
+            pytest.skip(f"database not available: {e}")
+        server.invalidate_schema_cache()
+        try:
+            return await tool_fn(server.get_table_sample)(table_name, **kwargs)
+        finally:
+            async with server.get_db_connection() as conn:
+                await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            await server.close_all_pools()
+
+    return asyncio.run(run())
+
+
+def test_unanalyzed_table_is_sampled_not_sorted_whole():
+    # Never analyzed, so reltuples is unknown; the estimate falls back to the page count
+    result = _run(
+        f"CREATE TABLE {SCHEMA}.big AS SELECT g AS id FROM generate_series(1, 200000) g",
+        f"{SCHEMA}.big", limit=5,
+    )
+    assert "error" not in result, result
+    assert result["row_count"] == 5
+    assert result["sample_percent"] < 100
+
+
+def test_length_columns_do_not_collide_with_real_columns():
+    result = _run(
+        f"CREATE TABLE {SCHEMA}.notes AS SELECT repeat('x', 50) AS body, 7 AS sample_length_0",
+        f"{SCHEMA}.notes", max_value_length=10,
+    )
+    assert "error" not in result, result
+    assert result["rows"] == [{"body": "x" * 10, "sample_length_0": 7}]
+    assert result["truncated"] == [{"row": 0, "column": "body", "length": 50}]
@@ -0,0 +1,69 @@
+"""get_table_statistics against the database configured through the DB_* environment
+variables (skipped when it cannot be reached).
+
+    DB_NAME=employee_db DB_USER=user DB_PASSWORD=pass python -m pytest tests
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+SCHEMA = "mcp_test"
+TABLE = "mixed_types"
+
+
+def tool_fn(tool):
+    # Newer fastmcp versions wrap decorated tools in a FunctionTool object
+    return getattr(tool, "fn", tool)
+
+
+async def _create_mixed_table():
+    async with server.get_db_connection() as conn:
+        await conn.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+        await conn.execute(f"DROP TABLE IF EXISTS {SCHEMA}.{TABLE}")
+        await conn.execute(
+            f"""
+            CREATE TABLE {SCHEMA}.{TABLE} AS
+            SELECT g as id, 'name ' || g as name, date '2024-01-01' + g as created_on,
+                   md5(g::text)::uuid as external_id, (g * 1.5)::numeric(10, 2) as amount
+            FROM generate_series(1, 1000) g
+            """
+        )
+        await conn.execute(f"ANALYZE {SCHEMA}.{TABLE}")
+
+
+async def _drop_mixed_table():
+    async with server.get_db_connection() as conn:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await server.close_all_pools()
+
+
+def _run_estimate():
+    async def run():
+        try:
+            await _create_mixed_table()
+        except (OSError, asyncio.TimeoutError, server.asyncpg.PostgresError) as e:
+            pytest.skip(f"database not available: {e}")
+        server.invalidate_schema_cache()
+        try:
+            return await tool_fn(server.get_table_statistics)(TABLE, schema_name=SCHEMA, mode="estimate")
+        finally:
+            await _drop_mixed_table()
+
+    return asyncio.run(run())
+
+
+def test_estimate_ignores_non_numeric_histograms():
+    # pg_stats has histograms for the text, date and uuid columns too; those must not be cast
+    result = _run_estimate()
+    assert "error" not in result, result
+    columns = {col["column_name"]: col for col in result["numeric_columns"]}
+    assert set(columns) == {"id", "amount"}
+    assert columns["id"]["min_value"] == 1
+    assert columns["id"]["max_value"] == 1000
+    assert columns["amount"]["median_value"] == pytest.approx(750, rel=0.05)